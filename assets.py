@@ -0,0 +1,122 @@
+"""Звуки и музыка, загружаемые в фоновом потоке.
+
+Окно и первый кадр не ждут открытия звукового устройства и чтения WAV:
+start() запускает загрузку в отдельном потоке и сразу возвращает future.
+Пока звук не загружен (или если загрузить его не удалось), sound() отдаёт
+беззвучную заглушку с тем же интерфейсом, поэтому игре не нужно проверять,
+есть ли звук. Громкость, заданная до окончания загрузки, применяется
+к звуку, как только он появится.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+SOUND_FILES = {
+    "move": "move.wav",
+    "clear": "line_clear.wav",
+    "over": "game_over.wav",
+}
+MUSIC_FILE = "background.mp3"
+
+
+class SilentSound:
+    """Заглушка вместо pygame.mixer.Sound."""
+
+    def play(self, *args, **kwargs):
+        return None
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+    def get_length(self):
+        return 0.0
+
+
+SILENT = SilentSound()
+
+
+class Assets:
+    def __init__(self, path, sound_files=SOUND_FILES, music_file=MUSIC_FILE):
+        """
+        :param path: папка с файлами
+        :param sound_files: имя звука -> файл
+        :param music_file: фоновая музыка (её может не быть)
+        """
+        self.path = path
+        self.sound_files = sound_files
+        self.music_file = music_file
+        self.sounds = {}
+        self.volumes = {}  # Громкость звуков, заданная до их загрузки
+        self.music_volume = 1.0
+        self.music = False  # Музыка загружена и играет
+        self.lock = threading.Lock()
+        self.future = None
+
+    def start(self):
+        """Запускает фоновую загрузку; повторные вызовы возвращают тот же future."""
+        if self.future is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+            self.future = executor.submit(self.load)
+            executor.shutdown(wait=False)  # Поток завершится сам после загрузки
+        return self.future
+
+    @property
+    def ready(self):
+        return self.future is not None and self.future.done()
+
+    def load(self):
+        """Выполняется в фоновом потоке. Возвращает True, если звук доступен."""
+        pygame.font.get_fonts()  # Список системных шрифтов нужен первому кадру
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print("Звук недоступен:", e)
+            return False
+        for name, file in self.sound_files.items():
+            try:
+                sound = pygame.mixer.Sound(os.path.join(self.path, file))
+            except (pygame.error, OSError) as e:
+                print(f"Не удалось загрузить звук {file}:", e)
+                continue
+            with self.lock:
+                sound.set_volume(self.volumes.get(name, 1.0))
+                self.sounds[name] = sound
+        music = os.path.join(self.path, self.music_file)
+        if os.path.exists(music):  # Фоновой музыки в поставке может не быть
+            try:
+                pygame.mixer.music.load(music)
+            except pygame.error as e:
+                print(f"Не удалось загрузить музыку {self.music_file}:", e)
+            else:
+                with self.lock:
+                    pygame.mixer.music.set_volume(self.music_volume)
+                    pygame.mixer.music.play(-1)  # Бесконечное воспроизведение фона
+                    self.music = True
+        return True
+
+    def sound(self, name): # Звук или заглушка, если он ещё не загружен
+        return self.sounds.get(name, SILENT)
+
+    def set_volume(self, name, volume):
+        with self.lock:
+            self.volumes[name] = volume
+            sound = self.sounds.get(name)
+            if sound is not None:
+                sound.set_volume(volume)
+
+    def set_music_volume(self, volume):
+        with self.lock:
+            self.music_volume = volume
+            if self.music:
+                pygame.mixer.music.set_volume(volume)
+
+    def stop_music(self):
+        with self.lock:
+            if self.music:
+                pygame.mixer.music.stop()
+                self.music = False
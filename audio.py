@@ -0,0 +1,106 @@
+"""Звук игры: свои каналы у каждой категории звуков и ограничение голосов.
+
+Каждой категории (move, clear, over) заранее отдаются собственные каналы
+микшера, поэтому частые звуки кнопок не могут занять все каналы и оборвать
+звук очистки строк. Одновременно звучит не больше voices звуков категории:
+если все её каналы заняты, новый звук заменяет самый старый. Повторы чаще
+interval мс пропускаются - при автоповторе клавиш это убирает лишние
+вызовы микшера. Музыка идёт отдельным потоком pygame.mixer.music.
+
+Размер буфера микшера задаётся до его открытия (pre_init): меньший буфер -
+меньше задержка между нажатием и звуком, но выше риск щелчков.
+"""
+import time
+from collections import namedtuple
+
+import pygame
+
+from assets import SILENT
+
+MUSIC = "music"
+
+# voices - одновременных звуков, interval - минимум мс между запусками
+Category = namedtuple("Category", "voices interval volume")
+CATEGORIES = {
+    "move": Category(voices=2, interval=30, volume=0.5),
+    "clear": Category(voices=1, interval=0, volume=0.8),
+    "over": Category(voices=1, interval=0, volume=0.5),
+}
+MUSIC_VOLUME = 0.5
+
+
+class AudioManager:
+    def __init__(self, assets, categories=CATEGORIES, music_volume=MUSIC_VOLUME,
+                 frequency=44100, buffer=512, clock=time.perf_counter):
+        """
+        :param assets: assets.Assets, откуда берутся звуки
+        :param categories: категория -> Category
+        :param music_volume: начальная громкость музыки
+        :param frequency: частота микшера, Гц
+        :param buffer: размер буфера микшера в сэмплах (степень двойки)
+        """
+        self.assets = assets
+        self.categories = categories
+        self.frequency = frequency
+        self.buffer = buffer
+        self.clock = clock
+        self.channels = None  # Категория -> список каналов, после открытия микшера
+        self.started = {}  # Канал -> когда в нём запущен звук
+        self.last_play = dict.fromkeys(categories, float("-inf"))
+        self.volumes = {MUSIC: music_volume}
+        self.volumes.update((name, category.volume) for name, category in categories.items())
+        for name, volume in self.volumes.items():
+            self.set_volume(name, volume)
+
+    def start(self):
+        """Задаёт параметры микшера и запускает фоновую загрузку звуков."""
+        if not pygame.mixer.get_init():
+            pygame.mixer.pre_init(frequency=self.frequency, buffer=self.buffer)
+        return self.assets.start()
+
+    def reserve_channels(self):
+        """Раздаёт категориям каналы; True, если микшер уже открыт."""
+        if self.channels is not None:
+            return True
+        if not self.assets.ready or not self.assets.future.result():
+            return False
+        total = sum(category.voices for category in self.categories.values())
+        pygame.mixer.set_num_channels(max(total, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(total)  # Свободный канал для Sound.play() ищется за ними
+        channels = iter(range(total))
+        self.channels = {name: [pygame.mixer.Channel(next(channels)) for _ in range(category.voices)]
+                         for name, category in self.categories.items()}
+        return True
+
+    def play(self, name):
+        """Запускает звук категории name; False, если звук пропущен."""
+        now = self.clock() * 1000
+        if now - self.last_play[name] < self.categories[name].interval:
+            return False
+        sound = self.assets.sound(name)
+        if sound is SILENT or not self.reserve_channels():
+            return False  # Звук ещё грузится или его нет
+        self.last_play[name] = now
+        channels = self.channels[name]
+        channel = next((channel for channel in channels if not channel.get_busy()), None)
+        if channel is None:
+            channel = min(channels, key=lambda channel: self.started.get(channel, 0))
+        self.started[channel] = now
+        channel.play(sound)
+        return True
+
+    def set_volume(self, name, volume):
+        """Единая точка изменения громкости категории или музыки (0.0-1.0)."""
+        volume = max(0.0, min(1.0, volume))
+        self.volumes[name] = volume
+        if name == MUSIC:
+            self.assets.set_music_volume(volume)
+        else:
+            self.assets.set_volume(name, volume)
+        return volume
+
+    def change_volume(self, name, delta):
+        return self.set_volume(name, round(self.volumes[name] + delta, 2))
+
+    def stop_music(self):
+        self.assets.stop_music()
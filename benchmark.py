@@ -0,0 +1,274 @@
+"""Замеры скорости горячих мест движка и отрисовки.
+
+Работает без окна и звука (SDL_VIDEODRIVER=dummy, SDL_AUDIODRIVER=dummy
+выставляются сами, если не заданы). Каждая операция вызывается на объекте
+TetrisGame, то есть с переопределениями из main.py. Для каждого замера
+выводятся операции в секунду и перцентили времени одной операции.
+
+    python benchmark.py --save          # записать базовые значения этой машины
+    python benchmark.py                 # сравнить с ними, код 1 при замедлении
+    python benchmark.py --filter frame  # только замеры с 'frame' в названии
+
+Базовые значения лежат в benchmarks/<имя машины>.json: сравнивать имеет
+смысл только замеры, сделанные на одном и том же железе.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from engine import ROWS, COLS, SHAPE_REGISTRY
+from shapes import SHAPE_SETS
+from main import TetrisGame
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+FILLS = (0.0, 0.25, 0.5, 0.75)  # Доля занятых строк снизу
+THRESHOLD = 0.25  # Допустимое замедление медианы относительно базового значения
+REPEAT = 2000  # Замеров на операцию
+NUMBER = 20  # Вызовов в одном замере операции без подготовки
+
+# before вызывается один раз перед замерами, setup (если есть) - перед каждой
+# операцией; ни то, ни другое в замер не входит
+Case = namedtuple("Case", "name op before setup")
+
+
+def fill_bits(fill, rng, holes=2):
+    """Маски строк поля, у которого занята доля fill строк снизу, в каждой - holes дыр."""
+    full = (1 << COLS) - 1
+    filled = int(ROWS * fill)
+    bits = [0] * (ROWS - filled)
+    for _ in range(filled):
+        row = full
+        for col in rng.sample(range(COLS), holes):
+            row &= ~(1 << col)
+        bits.append(row)
+    return bits
+
+
+def well_bits(lines):
+    """Поле с lines заполненными строками снизу, кроме колодца в последнем столбце."""
+    well = ((1 << COLS) - 1) >> 1
+    return [0] * (ROWS - lines) + [well] * lines
+
+
+def set_board(game, bits):
+    game.board.load(bits)
+
+
+def spawn(game, rotation):
+    game.piece, game.x, game.y = rotation, rotation.spawn_x, 0
+    game.game_over = False
+
+
+def make_cases(game):
+    rng = random.Random(0)
+    pieces = SHAPE_REGISTRY.pool(1)  # Фигуры в начальном положении
+    cases = []
+    for fill in FILLS:
+        bits = fill_bits(fill, rng)
+        label = f"fill={int(fill * 100)}%"
+
+        def preparer(bits=bits, drop=False):
+            # У каждого замера свой генератор: результат не зависит от --filter
+            pieces_rng = random.Random(0)
+
+            def prepare():
+                set_board(game, bits)
+                spawn(game, pieces_rng.choice(pieces))
+                if drop:
+                    game.hard_drop()
+            return prepare
+
+        cases += [
+            Case(f"check_collision[{label}]", lambda: game.check_collision(1, 1), preparer(), None),
+            Case(f"rotate_piece[{label}]", game.rotate_piece, preparer(), None),
+            Case(f"hard_drop[{label}]", game.hard_drop, None, preparer()),
+            Case(f"lock_piece[{label}]", game.lock_piece, None, preparer(drop=True)),
+        ]
+    # Очистка 1-4 линий: вертикальная палка в колодце у правого края
+    stick = next(rotation for shape_id in range(len(SHAPE_REGISTRY))
+                 for rotation in SHAPE_REGISTRY[shape_id].rotations
+                 if rotation.width == 1 and rotation.height == 4)
+    for lines in range(1, 5):
+        def filled(bits=well_bits(lines)):
+            set_board(game, bits)
+            spawn(game, stick)
+            game.x = COLS - 1 - stick.left
+            game.hard_drop()
+            game.board.place(game.piece, game.x, game.y)
+
+        cases.append(Case(f"clear_lines[lines={lines}]", game.clear_lines, None, filled))
+    for level in range(1, len(SHAPE_SETS) + 1):
+        def at_level(level=level):
+            game.level = level
+
+        cases.append(Case(f"new_piece[level={level}]", game.new_piece, at_level, None))
+    cases += state_cases(game, fill_bits(0.5, rng))
+    cases += frame_cases(game, fill_bits(0.5, rng))
+    return cases
+
+
+def state_cases(game, bits):
+    """Снимок, восстановление и копия партии (поиск ходов), перезапуск игры в том же окне."""
+    saved = []
+
+    def before():
+        set_board(game, bits)
+        spawn(game, game.next)
+        saved[:] = [game.snapshot()]
+
+    return [
+        Case("snapshot", game.snapshot, before, None),
+        Case("restore", lambda: game.restore(saved[0]), before, None),
+        Case("clone", game.clone, before, None),
+        Case("restart", game.restart, None, None),
+    ]
+
+
+def frame_cases(game, bits):
+    """Полный кадр (поле, фигура, счёт) и кадр по изменившимся областям, как в run()."""
+    def before():
+        set_board(game, bits)
+        spawn(game, game.next)
+        game.invalidate_screen()
+
+    def step():
+        game.x = (game.x + 1) % (COLS - game.piece.right)  # Фигура сдвигается каждый кадр
+        game.score += 1
+
+    def full_frame():
+        game.screen.fill((10, 10, 10))
+        game.draw_grid()
+        game.draw_piece()
+        game.draw_score()
+
+    def dirty_frame():
+        dirty = game.renderer.render(game.board, game.current_piece, game.x, game.y, game.ghost_y)
+        dirty += game.draw_panel()
+        return dirty
+
+    return [Case("frame[full]", full_frame, before, step), Case("frame[dirty]", dirty_frame, before, step)]
+
+
+def measure(case, repeat=REPEAT, number=NUMBER):
+    """Время одной операции в наносекундах: список из repeat замеров."""
+    clock = time.perf_counter_ns
+    op, setup = case.op, case.setup
+    if case.before:
+        case.before()
+    samples = []
+    if setup is None:
+        for _ in range(repeat):
+            start = clock()
+            for _ in range(number):
+                op()
+            samples.append((clock() - start) / number)
+    else:
+        for _ in range(repeat):
+            setup()
+            start = clock()
+            op()
+            samples.append(clock() - start)
+    return samples
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    last = len(samples) - 1
+
+    def percentile(p):
+        return samples[round(last * p / 100)]
+
+    mean = statistics.fmean(samples)
+    return {
+        "ops_per_sec": 1e9 / mean if mean else 0.0,
+        "mean_ns": mean,
+        "p50_ns": percentile(50),
+        "p90_ns": percentile(90),
+        "p99_ns": percentile(99),
+    }
+
+
+def machine():
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Названия замеров, у которых медиана выросла больше чем на threshold."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and result["p50_ns"] > base["p50_ns"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости движка и отрисовки")
+    parser.add_argument("--baseline", default=os.path.join(BASELINE_DIR, platform.node() + ".json"),
+                        help="файл базовых значений")
+    parser.add_argument("--save", action="store_true", help="записать результаты как базовые")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="допустимое замедление медианы, доля (0.25 - на 25%%)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="замеров на операцию")
+    parser.add_argument("--filter", default="", help="только замеры с этой подстрокой")
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args(argv)
+
+    game = TetrisGame(fps=0, seed=0)
+    results = {}
+    print(f"{'замер':<28}{'оп/с':>12}{'p50, мкс':>11}{'p90, мкс':>11}{'p99, мкс':>11}")
+    for case in make_cases(game):
+        if args.filter not in case.name:
+            continue
+        measure(case, max(1, args.repeat // 10))  # Прогрев
+        result = results[case.name] = summarize(measure(case, args.repeat))
+        print(f"{case.name:<28}{result['ops_per_sec']:>12.0f}{result['p50_ns'] / 1000:>11.2f}"
+              f"{result['p90_ns'] / 1000:>11.2f}{result['p99_ns'] / 1000:>11.2f}")
+    pygame.quit()
+
+    report = {"machine": machine(), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        if os.path.exists(args.baseline):  # Замеры с --filter дополняют файл
+            with open(args.baseline) as f:
+                report["results"] = dict(json.load(f)["results"], **results)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Базовые значения записаны в {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"Нет базовых значений {args.baseline}, запишите их с --save")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(f"ЗАМЕДЛЕНИЕ {name}: медиана {results[name]['p50_ns'] / 1000:.2f} мкс, "
+              f"было {baseline[name]['p50_ns'] / 1000:.2f} мкс")
+    if not regressions:
+        print(f"Замедлений больше {args.threshold:.0%} нет")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
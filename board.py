@@ -0,0 +1,315 @@
+"""Представления игрового поля.
+
+ListBoard - исходная сетка из списков (0/1 в каждой клетке).
+BitBoard - одна битовая маска на строку, бит col соответствует столбцу col.
+Оба класса дают доступ board.grid[row][col] для отрисовки, а в changed
+копят номера изменившихся кусков по CHUNK_ROWS строк (их забирает отрисовка):
+на поле в тысячи строк так дешевле отметить сдвиг всего, что выше линии.
+Фигуры передаются как shapes.Rotation с заранее посчитанными клетками и масками.
+
+Оба класса поддерживают индекс поверхности: heights - высота каждого столбца
+(0 - пустой) и cells - число занятых клеток. Он обновляется при фиксации
+фигуры, удалении строк и подъёме мусора, поэтому расстояние падения
+(drop_distance) считается за один проход по столбцам фигуры, а суммарная
+высота, дыры и неровность поля - без обхода сетки.
+"""
+
+CHUNK_ROWS = 16
+
+
+def mark_rows(changed, start, stop): # Отмечает куски, в которые попадают строки start..stop-1
+    if stop > start:
+        changed.update(range(start // CHUNK_ROWS, (stop - 1) // CHUNK_ROWS + 1))
+
+
+def scan_heights(row_bits, rows, cols, start=0):
+    """
+    Высоты столбцов по строкам поля.
+    :param row_bits: функция строка -> маска
+    :param start: с какой строки смотреть (выше неё поле пустое)
+    """
+    heights = [0] * cols
+    full = (1 << cols) - 1
+    seen = 0  # Столбцы, в которых сверху уже встретился блок
+    for row in range(start, rows):
+        value = row_bits(row)
+        new = value & ~seen
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = rows - row
+            new ^= low
+        seen |= value
+        if seen == full:
+            break  # Ниже высоты уже не изменятся
+    return heights
+
+
+def surface_distance(heights, rows, piece, x, y):
+    """
+    На сколько строк фигура опустится до поверхности стопки: по каждому
+    столбцу - от нижней клетки фигуры до верхнего блока столбца.
+    :return: расстояние или None, если фигура ниже поверхности (под навесом)
+    """
+    distance = rows
+    for col, top, bottom, count in piece.profile:
+        free = rows - heights[x + col] - y - bottom - 1
+        if free < distance:
+            if free < 0:
+                return None
+            distance = free
+    return distance
+
+
+def bumpiness(heights): # Сумма перепадов высот соседних столбцов
+    return sum(abs(heights[i] - heights[i + 1]) for i in range(len(heights) - 1))
+
+
+class ListBoard:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
+        self.changed = set()
+        mark_rows(self.changed, 0, rows)
+        self.heights = [0] * cols  # Высота каждого столбца
+        self.cells = 0  # Занятых клеток
+
+    def collides(self, piece, x, y): # Есть ли пересечение фигуры с полем или границами
+        grid = self.grid
+        for row, col in piece.cells:
+            new_x = x + col
+            new_y = y + row
+            if new_x < 0 or new_x >= self.cols or new_y >= self.rows or grid[new_y][new_x]:
+                return True
+        return False
+
+    def place(self, piece, x, y): # Переносим клетки фигуры на поле
+        for row, col in piece.cells:
+            self.grid[y + row][x + col] = 1
+        mark_rows(self.changed, y, y + piece.height)
+        heights = self.heights
+        for col, top, bottom, count in piece.profile:
+            heights[x + col] = max(heights[x + col], self.rows - y - top)
+        self.cells += len(piece.cells)
+
+    def drop_distance(self, piece, x, y): # На сколько строк фигура может опуститься
+        distance = surface_distance(self.heights, self.rows, piece, x, y)
+        if distance is None:  # Фигура под навесом - опускаем построчно
+            distance = 0
+            while not self.collides(piece, x, y + distance + 1):
+                distance += 1
+        return distance
+
+    def full_rows(self, rows=None): # Номера заполненных строк (среди rows, если указаны)
+        if rows is None:
+            rows = range(self.rows)
+        return [row for row in rows if all(self.grid[row])]
+
+    def remove_rows(self, lines): # Удаляем строки, всё что выше сдвигается вниз
+        for row in sorted(lines):
+            del self.grid[row]
+            self.grid.insert(0, [0 for _ in range(self.cols)])
+        mark_rows(self.changed, 0, max(lines) + 1)
+        self.cells -= len(lines) * self.cols
+        # Выше прежней вершины стопки поле пустым и осталось
+        self.heights[:] = scan_heights(self.row_bits, self.rows, self.cols, self.rows - max(self.heights))
+
+    @property
+    def holes(self): # Пустые клетки под верхними блоками столбцов
+        return sum(self.heights) - self.cells
+
+    def reindex(self): # Индекс поверхности заново по всему полю
+        self.heights[:] = scan_heights(self.row_bits, self.rows, self.cols)
+        self.cells = sum(map(sum, self.grid))
+
+    def row_bits(self, row): # Строка как битовая маска (бит col - столбец col)
+        return sum(1 << col for col, cell in enumerate(self.grid[row]) if cell)
+
+    def dump(self): # Маски всех строк - для снимка состояния
+        return tuple(self.row_bits(row) for row in range(self.rows))
+
+    def load(self, bits): # Строки из масок (снимок), всё поле перерисовывается
+        self.grid[:] = [[(value >> col) & 1 for col in range(self.cols)] for value in bits]
+        mark_rows(self.changed, 0, self.rows)
+        self.reindex()
+
+    def copy(self):
+        board = ListBoard.__new__(ListBoard)
+        board.rows, board.cols = self.rows, self.cols
+        board.grid = [row[:] for row in self.grid]
+        board.changed = set(self.changed)
+        board.heights = self.heights[:]
+        board.cells = self.cells
+        return board
+
+    def add_garbage(self, count, hole): # Снизу добавляются строки с дырой в столбце hole
+        overflow = any(any(row) for row in self.grid[:count])
+        del self.grid[:count]
+        self.grid.extend([int(col != hole) for col in range(self.cols)] for _ in range(count))
+        mark_rows(self.changed, 0, self.rows)
+        self.reindex()
+        return overflow
+
+
+class BitRow:
+    """
+    Строка битового поля в виде последовательности 0/1, только для чтения:
+    поле меняется методами BitBoard, которые обновляют и индекс высот.
+    """
+    __slots__ = ("board", "row")
+
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __len__(self):
+        return self.board.cols
+
+    def __getitem__(self, col):
+        if col < 0:
+            col += self.board.cols
+        if not 0 <= col < self.board.cols:
+            raise IndexError(col)
+        return (self.board.bits[self.row] >> col) & 1
+
+    def __iter__(self):
+        value = self.board.bits[self.row]
+        return ((value >> col) & 1 for col in range(self.board.cols))
+
+
+class BitGrid:
+    """Адаптер: битовое поле, доступное для чтения как grid[row][col]."""
+    __slots__ = ("board",)
+
+    def __init__(self, board):
+        self.board = board
+
+    def __len__(self):
+        return self.board.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.board.rows
+        if not 0 <= row < self.board.rows:
+            raise IndexError(row)
+        return BitRow(self.board, row)
+
+    def __iter__(self):
+        return (BitRow(self.board, row) for row in range(self.board.rows))
+
+
+class BitBoard:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.full_mask = (1 << cols) - 1
+        self.bits = [0] * rows
+        self.grid = BitGrid(self)
+        self.changed = set()
+        mark_rows(self.changed, 0, rows)
+        self.heights = [0] * cols
+        self.cells = 0
+
+    def collides(self, piece, x, y): # Несколько AND/сдвигов вместо обхода клеток
+        if x + piece.left < 0 or x + piece.right >= self.cols:
+            return True
+        bits = self.bits
+        rows = self.rows
+        for mask in piece.masks:
+            if mask:
+                if y >= rows:
+                    return True
+                if y >= 0 and bits[y] & (mask << x):
+                    return True
+            y += 1
+        return False
+
+    def place(self, piece, x, y):
+        bits = self.bits
+        for mask in piece.masks:
+            bits[y] |= mask << x
+            y += 1
+        y -= piece.height
+        mark_rows(self.changed, y, y + piece.height)
+        heights = self.heights
+        for col, top, bottom, count in piece.profile:
+            height = self.rows - y - top
+            if height > heights[x + col]:
+                heights[x + col] = height
+        self.cells += len(piece.cells)
+
+    def drop_distance(self, piece, x, y):
+        """
+        На сколько строк фигура может опуститься: по индексу поверхности за один
+        проход по столбцам фигуры, построчно - только если фигура под навесом.
+        """
+        distance = surface_distance(self.heights, self.rows, piece, x, y)
+        if distance is None:
+            distance = 0
+            while not self.collides(piece, x, y + distance + 1):
+                distance += 1
+        return distance
+
+    def full_rows(self, rows=None):
+        """Номера заполненных строк; rows - какие строки проверять (по умолчанию все)."""
+        full = self.full_mask
+        bits = self.bits
+        if rows is None:
+            return [row for row, value in enumerate(bits) if value == full]
+        return [row for row in rows if bits[row] == full]
+
+    def remove_rows(self, lines):
+        bits = self.bits
+        for row in sorted(lines, reverse=True):
+            del bits[row]
+        bits[:0] = [0] * len(lines)  # Сдвиг списка - одна операция memmove
+        mark_rows(self.changed, 0, max(lines) + 1)
+        self.cells -= len(lines) * self.cols
+        self.heights[:] = scan_heights(bits.__getitem__, self.rows, self.cols, self.rows - max(self.heights))
+
+    @property
+    def holes(self):
+        return sum(self.heights) - self.cells
+
+    def reindex(self):
+        self.heights[:] = scan_heights(self.bits.__getitem__, self.rows, self.cols)
+        self.cells = sum(value.bit_count() for value in self.bits)
+
+    def row_bits(self, row):
+        return self.bits[row]
+
+    def dump(self):
+        return tuple(self.bits)
+
+    def load(self, bits):
+        self.bits[:] = bits
+        mark_rows(self.changed, 0, self.rows)
+        self.reindex()
+
+    def copy(self): # Копия для поиска: маски - неизменяемые числа, копируется только список
+        board = BitBoard.__new__(BitBoard)
+        board.rows, board.cols, board.full_mask = self.rows, self.cols, self.full_mask
+        board.bits = self.bits[:]
+        board.grid = BitGrid(board)
+        board.changed = set(self.changed)
+        board.heights = self.heights[:]
+        board.cells = self.cells
+        return board
+
+    def add_garbage(self, count, hole):
+        """
+        Поднимает поле на count строк и заполняет низ строками с дырой в столбце hole.
+        :return: True, если блоки вытолкнуло за верх поля
+        """
+        bits = self.bits
+        overflow = any(bits[:count])
+        del bits[:count]
+        bits.extend([self.full_mask & ~(1 << hole)] * count)
+        mark_rows(self.changed, 0, self.rows)
+        if overflow:
+            self.reindex()
+        else:
+            self.heights[:] = [height + count if height else count * (col != hole)
+                               for col, height in enumerate(self.heights)]
+            self.cells += count * (self.cols - 1)
+        return overflow
@@ -0,0 +1,146 @@
+"""Бот, который ставит фигуры по оценке получившегося поля.
+
+Для каждого различного поворота и каждого столбца фигура сбрасывается вниз,
+у получившегося поля считаются признаки (высота, дыры, неровность, линии),
+и выбирается положение с лучшей линейной оценкой. Работает с BitBoard.
+
+Место падения и признаки поля без очищенных линий берутся из индекса
+поверхности поля (board.heights, board.holes): меняются только столбцы
+фигуры, обходить строки не нужно.
+"""
+from board import bumpiness
+from engine import ACTION_DROP, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE
+from placements import locked_bits
+from shapes import shape_registry
+
+# Веса признаков; чем больше сумма, тем лучше положение
+HEURISTICS = {
+    "default": {"height": -0.510066, "lines": 0.760666, "holes": -0.35663, "bumpiness": -0.184483},
+    "survival": {"height": -0.6, "max_height": -0.4, "lines": 0.4, "holes": -1.0, "bumpiness": -0.3},
+    "greedy": {"lines": 1.0, "holes": -0.2, "height": -0.05},
+}
+
+
+def board_features(bits, cols, lines=0):
+    """
+    Признаки поля по битовым маскам строк.
+    :param bits: маски строк сверху вниз
+    :param cols: ширина поля
+    :param lines: сколько линий очистил ход
+    :return: словарь признаков
+    """
+    rows = len(bits)
+    heights = [0] * cols
+    seen = 0  # Столбцы, в которых сверху уже встретился блок
+    holes = 0
+    for row, value in enumerate(bits):
+        new = value & ~seen
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = rows - row
+            new ^= low
+        seen |= value
+        holes += (seen & ~value).bit_count()  # Пустые клетки под блоками
+    return surface_features(heights, holes, lines)
+
+
+def surface_features(heights, holes, lines=0): # Признаки по высотам столбцов и числу дыр
+    return {
+        "height": sum(heights),
+        "max_height": max(heights),
+        "holes": holes,
+        "bumpiness": bumpiness(heights),
+        "lines": lines,
+    }
+
+
+def placed_features(board, rotation, x, y):
+    """
+    Признаки поля после фиксации фигуры без очистки линий - по индексу
+    поверхности: фигура лежит на поверхности, под ней появляются новые дыры.
+    :return: словарь признаков или None, если фигура под навесом
+    """
+    heights = board.heights[:]
+    holes = board.holes
+    rows = board.rows
+    for col, top, bottom, count in rotation.profile:
+        gap = rows - heights[x + col] - y - bottom - 1  # Пустые клетки между фигурой и столбцом
+        if gap < 0:
+            return None
+        holes += gap + bottom - top + 1 - count  # И пропуски внутри столбца фигуры
+        heights[x + col] = rows - y - top
+    return surface_features(heights, holes)
+
+
+def evaluate(features, weights): # Линейная оценка признаков
+    return sum(weight * features[name] for name, weight in weights.items())
+
+
+def drop_placements(board, shape_id):
+    """
+    Положения фигуры, сброшенной сверху в каждый столбец.
+    :return: генератор (поворот, x, y)
+    """
+    cols = board.cols
+    for rotation in shape_registry(cols)[shape_id].orientations:
+        for x in range(-rotation.left, cols - rotation.right):
+            if board.collides(rotation, x, 0):
+                continue
+            yield rotation, x, board.drop_distance(rotation, x, 0)
+
+
+def drop_features(board, rotation, x, y):
+    """Признаки поля после фиксации фигуры; строки обходятся, только если очищены линии."""
+    full = board.full_mask
+    bits = board.bits
+    if not any(mask and bits[y + row] | mask << x == full for row, mask in enumerate(rotation.masks)):
+        features = placed_features(board, rotation, x, y)
+        if features is not None:
+            return features
+    bits, lines = locked_bits(bits, rotation, x, y, full)
+    return board_features(bits, board.cols, lines)
+
+
+def plan_actions(game, choice):
+    """Нажатия, которые переводят фигуру в положение (поворот, x) и сбрасывают её."""
+    rotation, x = choice
+    actions = []
+    piece = game.piece
+    while piece is not rotation and len(actions) < 4:
+        piece = piece.next
+        actions.append(ACTION_ROTATE)
+    dx = x - game.x
+    actions += [ACTION_RIGHT if dx > 0 else ACTION_LEFT] * abs(dx)
+    actions.append(ACTION_DROP)
+    return actions
+
+
+class Bot:
+    def __init__(self, weights=None):
+        self.weights = weights or HEURISTICS["default"]
+
+    def choose(self, engine):
+        """Лучшее положение текущей фигуры: (поворот, x) или None."""
+        best = None
+        best_score = None
+        board = engine.board
+        for rotation, x, y in drop_placements(board, engine.piece.shape_id):
+            score = evaluate(drop_features(board, rotation, x, y), self.weights)
+            if best_score is None or score > best_score:
+                best, best_score = (rotation, x), score
+        return best
+
+    def play(self, engine):
+        """
+        Ставит текущую фигуру теми же нажатиями, что и игрок: повороты и сдвиги
+        через engine.apply(), затем сброс. Если фигура упёрлась, сбрасывается там,
+        где остановилась. Возвращает число очищенных линий.
+        """
+        choice = self.choose(engine)
+        if choice is not None:
+            for action in plan_actions(engine, choice)[:-1]:
+                before = engine.piece, engine.x
+                engine.apply(action)
+                if (engine.piece, engine.x) == before:
+                    break  # Поворот или сдвиг не удался
+        return engine.step(ACTION_DROP)
@@ -0,0 +1,114 @@
+"""Сверка пакетной среды vecenv.py с TetrisEngine.
+
+Для каждого сида идут две партии: одна в VecTetrisEnv, другая в
+TetrisEngine(rng=random.Random(seed)), и обе получают одни и те же действия.
+После каждого шага сравниваются поле, фигуры, положение, очки, линии,
+уровень и конец партии. Чётные партии ведёт бот (очищает линии и растит
+уровень), нечётные - случайные нажатия из генератора с тем же сидом.
+
+    python check_vecenv.py                      # 16 партий, сиды 0..15
+    python check_vecenv.py --envs 64 --seed 1000 --steps 5000
+
+Код 1, если хоть одна партия разошлась с движком.
+"""
+import argparse
+import random
+import sys
+from collections import deque
+
+import numpy as np
+
+from bot import Bot, plan_actions
+from engine import TetrisEngine, ACTION_NONE, ACTION_DROP
+from vecenv import VecTetrisEnv
+
+
+def engine_state(engine): # Те же поля, что в наблюдении vecenv, и признак конца
+    return {
+        "board": np.array(engine.grid, dtype=np.uint8),
+        "piece": engine.piece.shape_id,
+        "rotation": engine.piece.index,
+        "x": engine.x,
+        "y": engine.y,
+        "next_piece": engine.next.shape_id,
+        "score": engine.score,
+        "lines": engine.lines_cleared,
+        "level": engine.level,
+        "done": engine.game_over,
+    }
+
+
+def vec_state(env, obs, i): # Состояние партии i среды в виде engine_state()
+    return {
+        "board": obs["board"][i],
+        "piece": int(obs["piece"][i]),
+        "rotation": int(obs["rotation"][i]),
+        "x": int(obs["x"][i]),
+        "y": int(obs["y"][i]),
+        "next_piece": int(obs["next_piece"][i]),
+        "score": int(env.score[i]),
+        "lines": int(env.lines_cleared[i]),
+        "level": int(env.level[i]),
+        "done": bool(env.dones[i]),
+    }
+
+
+def differences(expected, actual): # Названия полей, в которых состояния расходятся
+    return [key for key in expected if not np.array_equal(expected[key], actual[key])]
+
+
+def check(seeds, steps):
+    """
+    Играет партии с сидами seeds не больше steps шагов.
+    :return: список расхождений (сид, шаг, поля); пустой, если всё совпало
+    """
+    seeds = list(seeds)
+    env = VecTetrisEnv(len(seeds), seeds)
+    obs = env.observation()
+    engines = [TetrisEngine(rng=random.Random(seed)) for seed in seeds]
+    inputs = [random.Random(seed) for seed in seeds]  # Нажатия для партий без бота
+    plans = [deque() for _ in seeds]
+    bot = Bot()
+    mismatches = []
+    failed = set()
+    for step in range(steps + 1):
+        for i, (seed, engine) in enumerate(zip(seeds, engines)):
+            if i not in failed:
+                fields = differences(engine_state(engine), vec_state(env, obs, i))
+                if fields:
+                    mismatches.append((seed, step, fields))
+                    failed.add(i)  # Дальше партии уже не сравнимы
+        if step == steps or all(engine.game_over for engine in engines):
+            break
+        actions = np.full(len(seeds), ACTION_NONE)
+        for i, engine in enumerate(engines):
+            if engine.game_over:
+                continue
+            if i % 2:
+                actions[i] = inputs[i].randrange(ACTION_DROP + 1)
+            else:
+                if not plans[i]:
+                    choice = bot.choose(engine)
+                    plans[i].extend(plan_actions(engine, choice) if choice else [ACTION_DROP])
+                actions[i] = plans[i].popleft()
+            engine.step(int(actions[i]))
+        obs = env.step(actions)[0]
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сверка vecenv с TetrisEngine")
+    parser.add_argument("--envs", type=int, default=16, help="количество партий")
+    parser.add_argument("--seed", type=int, default=0, help="сид первой партии")
+    parser.add_argument("--steps", type=int, default=3000, help="шагов на партию")
+    args = parser.parse_args(argv)
+    seeds = range(args.seed, args.seed + args.envs)
+    mismatches = check(seeds, args.steps)
+    for seed, step, fields in mismatches:
+        print(f"сид {seed}: расхождение на шаге {step} - {', '.join(fields)}")
+    print(f"Партий: {args.envs}, разошлись: {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
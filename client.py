@@ -0,0 +1,333 @@
+"""Клиент сетевых партий (server.py).
+
+Окно игры только рисует то, что присылает сервер, и отправляет ему нажатия:
+поле, фигура и счёт каждого игрока собираются из изменений в RemoteGame.
+Поле хранится в BitBoard, поэтому BoardRenderer перерисовывает только
+изменившиеся куски, как и в обычной игре.
+
+    python client.py --players 2 --name Вася
+
+Без окна клиент работает ботом: фигуры ставит bot.Bot по зеркалу поля,
+а в конце сверяет контрольные суммы полей с сервером. Так проверяется
+сервер под нагрузкой целиком на localhost:
+
+    python client.py --bots 400 --duration 30 --local
+"""
+import argparse
+import asyncio
+import json
+import queue
+import socket
+import threading
+import time
+
+import pygame
+
+from board import BitBoard, mark_rows
+from bot import Bot, plan_actions
+from engine import TICK_MS, ACTION_SOFT_DROP_END
+from main import (KEY_ACTIONS, BLOCK_SIZE, MAX_VIEW_WIDTH, MAX_VIEW_HEIGHT, SCREEN_HEIGHT, MALINA_COLOR,
+                  BACKGROUND_COLOR, GRID_COLOR, NEXT_PIECE_BG, GHOST_COLOR)
+from renderer import BoardRenderer, make_tile
+from server import HOST, PORT, Server, board_digest, encode
+from shapes import shape_registry
+from textcache import TextCache
+
+OPPONENT_BLOCK = 12  # Размер клетки на полях соперников
+PANEL_WIDTH = 220
+
+
+class RemoteGame:
+    """Зеркало партии игрока, собранное из сообщений сервера."""
+
+    def __init__(self, name, rows, cols):
+        self.name = name
+        self.rows = rows
+        self.cols = cols
+        self.shapes = shape_registry(cols)
+        self.board = BitBoard(rows, cols)
+        self.piece = None  # shapes.Rotation
+        self.next = None
+        self.x = self.y = 0
+        self.pieces = 0
+        self.score = self.level = self.lines_cleared = self.garbage = 0
+        self.game_over = False
+
+    def apply(self, state): # Изменения из сообщения "state"
+        if "rows" in state:
+            bits = self.board.bits
+            for row, value in state["rows"]:
+                bits[row] = value
+                mark_rows(self.board.changed, row, row + 1)
+            self.board.reindex()  # Высоты столбцов - для бота и тени фигуры
+        if "piece" in state:
+            shape_id, index, self.x, self.y, self.pieces = state["piece"]
+            self.piece = self.shapes[shape_id].rotations[index]
+        if "score" in state:
+            shape_id, index = state["next"]
+            self.next = self.shapes[shape_id].rotations[index]
+            self.score, self.level, self.lines_cleared = state["score"], state["level"], state["lines"]
+            self.garbage, self.game_over = state["garbage"], state["over"]
+
+    @property
+    def current_piece(self):
+        return self.piece.matrix
+
+    @property
+    def ghost_y(self):
+        return self.y + self.board.drop_distance(self.piece, self.x, self.y)
+
+
+def start_games(message): # Зеркала всех игроков матча из сообщения "start"
+    return [RemoteGame(player, message["rows"], message["cols"]) for player in message["names"]]
+
+
+def check_digests(games, digests): # Совпадают ли зеркала с полями на сервере
+    return all(board_digest(game.board) == digest for game, digest in zip(games, digests))
+
+
+async def run_bot(host, port, name, players, duration):
+    """
+    Бот-клиент без окна: играет duration секунд, затем сверяет поля с сервером.
+    :return: словарь с итогами (очки, совпали ли поля, принято байт)
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "join", "name": name, "players": players}))
+    bot = Bot()
+    games = None
+    you = 0
+    planned = None  # Номер фигуры, для которой уже отправлены нажатия
+    received = 0
+    result = {"name": name, "score": 0, "lines": 0, "match": None, "digest_ok": None, "over": False}
+    deadline = None
+    synced = False
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                line = await asyncio.wait_for(reader.readline(), timeout)
+            except asyncio.TimeoutError:
+                writer.write(encode({"type": "sync"}))  # Время вышло: сверяем поля
+                deadline = None
+                synced = True
+                continue
+            if not line:
+                break
+            received += len(line)
+            message = json.loads(line)
+            kind = message["type"]
+            if kind == "start":
+                games = start_games(message)
+                you = message["you"]
+                result["match"] = message["match"]
+                deadline = time.monotonic() + duration
+            elif kind == "state":
+                for number, state in message["players"]:
+                    games[number].apply(state)
+                game = games[you]
+                if not game.game_over and game.piece and game.pieces != planned:
+                    planned = game.pieces
+                    choice = bot.choose(game)
+                    if choice is not None:
+                        for action in plan_actions(game, choice):
+                            writer.write(encode({"type": "action", "action": action}))
+            elif kind == "digest":
+                result["digest_ok"] = check_digests(games, message["digests"])
+                if synced:
+                    break
+            elif kind == "over":  # Матч кончился раньше срока, суммы полей - в итогах
+                result["over"] = True
+                result["digest_ok"] = check_digests(games, message["digests"])
+                break
+    finally:
+        writer.close()
+    if games:
+        result["score"] = games[you].score
+        result["lines"] = games[you].lines_cleared
+    result["received"] = received
+    return result
+
+
+async def run_bots(host, port, count, players, duration, local):
+    """Запускает count ботов (при local - и сервер в этом же процессе), печатает итоги."""
+    server = task = None
+    if local:
+        server = Server()
+        port = await server.start(host, 0)
+        task = asyncio.create_task(server.run())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_bot(host, port, f"bot{i}", players, duration)
+                                     for i in range(count)))
+    elapsed = time.perf_counter() - start
+    if server:
+        task.cancel()
+        server.server.close()
+    checked = [result for result in results if result["digest_ok"] is not None]
+    mismatched = [result["name"] for result in checked if not result["digest_ok"]]
+    received = sum(result["received"] for result in results)
+    print(f"ботов {count}, матчей {len({result['match'] for result in results})}, {elapsed:.1f} с")
+    print(f"линий {sum(result['lines'] for result in results)}, "
+          f"принято {received / elapsed / 1024:.0f} КБ/с ({received / count / elapsed:.0f} Б/с на бота)")
+    if server:
+        print(f"тактов сервера {server.ticks} из {int(elapsed * 1000 / TICK_MS)}")
+    print(f"поля сверены у {len(checked)}, расхождений {len(mismatched)}", *mismatched[:10])
+    return 1 if mismatched else 0
+
+
+class NetworkGame:
+    """Окно сетевой партии: рисует зеркала игроков и отправляет нажатия."""
+
+    def __init__(self, host, port, name, players, fps):
+        self.socket = socket.create_connection((host, port))
+        self.inbox = queue.Queue()
+        threading.Thread(target=self.receive, daemon=True).start()
+        self.send({"type": "join", "name": name, "players": players})
+        self.fps = fps
+        self.games = None
+        self.you = 0
+        self.result = None  # Текст итога матча
+
+    def receive(self): # Фоновый поток: строки сервера -> очередь
+        with self.socket.makefile("rb") as lines:
+            for line in lines:
+                self.inbox.put(json.loads(line))
+        self.inbox.put(None)  # Соединение закрыто
+
+    def send(self, message):
+        self.socket.sendall(encode(message))
+
+    def send_action(self, action):
+        self.send({"type": "action", "action": action})
+
+    def layout(self, message):
+        """Окно по сообщению "start": своё поле, панель и поля соперников справа."""
+        self.games = start_games(message)
+        self.you = message["you"]
+        rows, cols = message["rows"], message["cols"]
+        view = (min(cols * BLOCK_SIZE, MAX_VIEW_WIDTH), min(rows * BLOCK_SIZE, MAX_VIEW_HEIGHT))
+        small = (min(cols * OPPONENT_BLOCK, MAX_VIEW_WIDTH // 3), min(rows * OPPONENT_BLOCK, MAX_VIEW_HEIGHT))
+        opponents = len(self.games) - 1
+        width = view[0] + PANEL_WIDTH + opponents * (small[0] + 10)
+        self.screen = pygame.display.set_mode((width, max(view[1], small[1] + 30, SCREEN_HEIGHT)))
+        self.screen.fill(BACKGROUND_COLOR)
+        pygame.display.flip()
+        # Каждое поле рисуется своим BoardRenderer в подповерхность окна
+        self.views = []
+        x = view[0] + PANEL_WIDTH
+        for number, game in enumerate(self.games):
+            if number == self.you:
+                rect = pygame.Rect((0, 0), view)
+                block = BLOCK_SIZE
+                ghost = GHOST_COLOR  # Тень фигуры - только на своём поле
+            else:
+                rect = pygame.Rect((x, 30), small)
+                block = OPPONENT_BLOCK
+                ghost = None
+                x += small[0] + 10
+            renderer = BoardRenderer(self.screen.subsurface(rect), rows, cols, block, MALINA_COLOR,
+                                     BACKGROUND_COLOR, GRID_COLOR, rect.size, ghost)
+            self.views.append((game, renderer, rect.topleft))
+        self.panel_rect = pygame.Rect(view[0], 0, PANEL_WIDTH, self.screen.get_height())
+        self.panel_key = None
+        self.next_tile = make_tile(MALINA_COLOR, GRID_COLOR, BLOCK_SIZE)
+
+    def draw_panel(self, text):
+        """Панель со своим счётом и подписи над полями соперников, если что-то изменилось."""
+        game = self.games[self.you]
+        key = (game.next, game.score, game.level, game.lines_cleared, game.garbage, self.result,
+               tuple(game.score for game in self.games))
+        if key == self.panel_key:
+            return []
+        self.panel_key = key
+        self.screen.fill(BACKGROUND_COLOR, self.panel_rect)
+        x, y = self.panel_rect.x + 10, 10
+        pygame.draw.rect(self.screen, NEXT_PIECE_BG, (x, y, 150, 150))
+        if game.next:
+            tile = self.next_tile
+            self.screen.blits([(tile, (x + col * BLOCK_SIZE, y + row * BLOCK_SIZE))
+                               for row, line in enumerate(game.next.matrix)
+                               for col, cell in enumerate(line) if cell], False)
+        lines = [f"Очки: {game.score}", f"Уровень: {game.level}", f"Линии: {game.lines_cleared}",
+                 f"Мусор: {game.garbage}"]
+        for i, line in enumerate(lines):
+            self.screen.blit(text.render(line, (255, 255, 255)), (x, 170 + i * 30))
+        if self.result:
+            self.screen.blit(text.render(self.result, MALINA_COLOR, 24), (x, 300))
+            self.screen.blit(text.render("Выход - Esc", (255, 255, 255)), (x, 340))
+        dirty = [self.panel_rect]
+        for number, (game, renderer, (left, top)) in enumerate(self.views):
+            if number != self.you:
+                label = pygame.Rect(left, 0, renderer.view_rect.width, top)
+                self.screen.fill(BACKGROUND_COLOR, label)
+                self.screen.blit(text.render(f"{game.name}: {game.score}", (255, 255, 255)), (left, 5))
+                dirty.append(label)
+        return dirty
+
+    def run(self):
+        pygame.display.init()
+        pygame.display.set_caption("Малиновый Тетрис - сеть")
+        clock = pygame.time.Clock()
+        text = TextCache()
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key in KEY_ACTIONS and self.games and not self.result:
+                        self.send_action(KEY_ACTIONS[event.key])
+                elif event.type == pygame.KEYUP and event.key == pygame.K_DOWN and self.games:
+                    self.send_action(ACTION_SOFT_DROP_END)
+            while not self.inbox.empty():
+                message = self.inbox.get()
+                if message is None:
+                    self.result = self.result or "Нет связи"
+                elif message["type"] == "start":
+                    self.layout(message)
+                elif message["type"] == "state":
+                    for number, state in message["players"]:
+                        self.games[number].apply(state)
+                elif message["type"] == "over":
+                    self.result = "Победа!" if message["winner"] == self.you else "Поражение"
+                elif message["type"] == "error":
+                    print("Сервер:", message["message"])
+            if self.games is None:
+                clock.tick(30)  # Ждём соперников
+                continue
+            dirty = []
+            for game, renderer, offset in self.views:
+                if game.piece is None:
+                    continue
+                renderer.follow(game.x, game.y, game.piece.width, game.piece.height)
+                dirty += [rect.move(offset) for rect in
+                          renderer.render(game.board, game.current_piece, game.x, game.y,
+                                          game.ghost_y if renderer.ghost_color else None)]
+            dirty += self.draw_panel(text)
+            pygame.display.update(dirty)
+            clock.tick(self.fps)
+        self.socket.close()
+        pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Клиент сетевых партий тетриса")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--name", default="Player")
+    parser.add_argument("--players", type=int, default=2, help="игроков в матче")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--bots", type=int, default=0, help="вместо окна запустить столько ботов")
+    parser.add_argument("--duration", type=float, default=30.0, help="сколько секунд играют боты")
+    parser.add_argument("--local", action="store_true", help="боты со своим сервером в этом процессе")
+    args = parser.parse_args(argv)
+    if args.bots:
+        return asyncio.run(run_bots(args.host, args.port, args.bots, args.players, args.duration,
+                                    args.local))
+    NetworkGame(args.host, args.port, args.name, args.players, args.fps).run()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,382 @@
+"""Игровая логика тетриса без зависимости от pygame (дисплей, звук).
+
+Движок можно использовать в симуляциях и ботах напрямую, а окно игры
+(main.TetrisGame) строится поверх него.
+"""
+import copy
+import random
+from collections import deque, namedtuple
+
+from board import BitBoard, ListBoard
+from shapes import shape_registry
+
+# Размеры игрового поля по умолчанию (в клетках)
+ROWS = 20
+COLS = 10
+
+# Действия для step()
+ACTION_NONE = 0
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_DOWN = 3
+ACTION_ROTATE = 4
+ACTION_DROP = 5
+ACTIONS = (ACTION_NONE, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_DROP)
+# Действия игры в реальном времени: клавиша вниз зажата / отпущена
+ACTION_SOFT_DROP = 6
+ACTION_SOFT_DROP_END = 7
+
+# Прогрессия: уровень растёт каждые LINES_PER_LEVEL линий, интервал падения (мс)
+# уменьшается на FALL_SPEED_STEP за уровень, но не ниже FALL_SPEED_MIN
+LINES_PER_LEVEL = 10
+FALL_SPEED_BASE = 1000
+FALL_SPEED_STEP = 70
+FALL_SPEED_MIN = 200
+
+# Длительность такта симуляции (мс) и повтор мягкого сброса при зажатой клавише
+TICK_MS = 10
+SOFT_DROP_REPEAT = 50
+
+# Все фигуры и их повороты считаются один раз на каждую ширину поля
+SHAPE_REGISTRY = shape_registry(COLS)
+
+# Снимок партии (snapshot/restore): только числа, кортежи и списки, поэтому
+# он сериализуется в JSON как есть. Фигуры - пары (shape_id, номер поворота),
+# поле - маски строк, rng - random.getstate()
+State = namedtuple("State", "rows cols bits piece next x y rng seed score level lines_cleared "
+                            "fall_speed fall_time lock_time soft_drop soft_drop_time ticks "
+                            "game_over clearing_rows clear_timer pending_actions")
+
+
+class TetrisEngine:
+    def __init__(self, rng=None, seed=None, bitboard=True, clear_delay=0, lock_delay=None,
+                 lines_per_level=LINES_PER_LEVEL, fall_speed_base=FALL_SPEED_BASE,
+                 fall_speed_step=FALL_SPEED_STEP, fall_speed_min=FALL_SPEED_MIN,
+                 rows=ROWS, cols=COLS):
+        # rng - свой источник случайности; по умолчанию random.Random(seed)
+        # seed - сид партии (по умолчанию случайный), по нему партию можно повторить
+        # bitboard - хранить поле битовыми масками строк (иначе списками)
+        # clear_delay - сколько мс заполненные строки остаются на поле перед
+        #   удалением (для анимации); 0 - удалять сразу, как в симуляциях
+        # lock_delay - через сколько мс лежащая фигура фиксируется в tick();
+        #   None - фиксирует очередной шаг гравитации
+        # lines_per_level, fall_speed_* - прогрессия уровней (см. константы выше)
+        # rows, cols - размеры поля
+        if rng is None:
+            if seed is None:
+                seed = random.randrange(2 ** 32)
+            rng = random.Random(seed)
+        self.seed = seed  # None, если rng передан снаружи
+        self.rng = rng
+        self.recorder = None  # Запись действий игрока (replay.ReplayWriter)
+        self.board_class = BitBoard if bitboard else ListBoard
+        self.rows = rows
+        self.cols = cols
+        self.shapes = shape_registry(cols)
+        self.clear_delay = clear_delay
+        self.lock_delay = lock_delay
+        self.lines_per_level = lines_per_level
+        self.fall_speed_base = fall_speed_base
+        self.fall_speed_step = fall_speed_step
+        self.fall_speed_min = fall_speed_min
+        self.reset()
+
+    @property
+    def grid(self): # Поле в виде grid[row][col] для отрисовки
+        return self.board.grid
+
+    @property
+    def current_piece(self): # Матрица текущей фигуры
+        return self.piece.matrix
+
+    @property
+    def next_piece(self): # Матрица следующей фигуры
+        return self.next.matrix
+
+    def reset(self, seed=None): # Начальное состояние партии (с новым сидом, если указан)
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        # Создаём пустое игровое поле
+        self.board = self.board_class(self.rows, self.cols)
+
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.fall_speed = self.fall_speed_base
+        self.fall_time = 0  # Время с последнего шага гравитации (мс, кратно TICK_MS)
+        self.lock_time = 0  # Сколько фигура уже лежит на опоре
+        self.soft_drop = False
+        self.soft_drop_time = 0
+        self.ticks = 0  # Сколько тактов tick() прошло с начала партии
+
+        self.piece = self.new_piece()  # Текущая фигура (shapes.Rotation)
+        self.next = self.new_piece()
+        self.x = self.piece.spawn_x
+        self.y = 0
+        self.game_over = False
+
+        # Очистка строк с задержкой: строки, оставшееся время и отложенные действия
+        self.clearing_rows = []
+        self.clear_timer = 0
+        self.pending_actions = deque()
+
+    def snapshot(self):
+        """Снимок состояния партии (State); настройки движка в него не входят."""
+        return State(self.rows, self.cols, self.board.dump(),
+                     (self.piece.shape_id, self.piece.index), (self.next.shape_id, self.next.index),
+                     self.x, self.y, self.rng.getstate(), self.seed, self.score, self.level,
+                     self.lines_cleared, self.fall_speed, self.fall_time, self.lock_time,
+                     self.soft_drop, self.soft_drop_time, self.ticks, self.game_over,
+                     list(self.clearing_rows), self.clear_timer, list(self.pending_actions))
+
+    def check_state(self, state):
+        """
+        Проверяет снимок, не меняя партию; ValueError, если он не подходит движку.
+        restore() вызывает её первой, поэтому испорченный снимок не портит поле наполовину.
+        """
+        if (state.rows, state.cols) != (self.rows, self.cols):
+            raise ValueError(f"снимок поля {state.rows}x{state.cols}, а у движка {self.rows}x{self.cols}")
+        try:
+            if len(state.bits) != self.rows or not all(
+                    type(value) is int and 0 <= value < 1 << self.cols for value in state.bits):
+                raise ValueError("маски строк не совпадают с размером поля")
+            self.rotation(state.piece)
+            self.rotation(state.next)
+            version, internal, gauss = state.rng
+            scratch = random.Random.__new__(random.Random)  # Пробуем состояние на черновом генераторе
+            scratch.setstate((version, tuple(internal), gauss))
+            list(state.clearing_rows), list(state.pending_actions)
+        except (TypeError, IndexError, KeyError) as e:
+            raise ValueError(f"испорченный снимок: {e!r}") from e
+
+    def rotation(self, pair): # Поворот фигуры по паре (shape_id, номер поворота) из снимка
+        shape_id, index = pair
+        if not (0 <= shape_id < len(self.shapes)
+                and 0 <= index < len(self.shapes[shape_id].rotations)):
+            raise ValueError(f"нет фигуры {pair!r}")
+        return self.shapes[shape_id].rotations[index]
+
+    def restore(self, state):
+        """
+        Возвращает партию к снимку. Поле остаётся тем же объектом (перерисовывается целиком).
+        :param state: State из snapshot() или прочитанный из файла
+        """
+        self.check_state(state)
+        self.board.load(state.bits)
+        self.piece = self.rotation(state.piece)
+        self.next = self.rotation(state.next)
+        self.x, self.y = state.x, state.y
+        version, internal, gauss = state.rng
+        self.rng.setstate((version, tuple(internal), gauss))  # Из JSON приходят списки
+        self.seed = state.seed
+        self.score, self.level, self.lines_cleared = state.score, state.level, state.lines_cleared
+        self.fall_speed, self.fall_time, self.lock_time = state.fall_speed, state.fall_time, state.lock_time
+        self.soft_drop, self.soft_drop_time = state.soft_drop, state.soft_drop_time
+        self.ticks = state.ticks
+        self.game_over = state.game_over
+        self.clearing_rows = list(state.clearing_rows)
+        self.clear_timer = state.clear_timer
+        self.pending_actions = deque(state.pending_actions)
+
+    def clone(self):
+        """
+        Независимая копия партии для поиска ходов: копируются только поле,
+        генератор и очереди, настройки и фигуры общие. Повтор не пишется.
+        """
+        other = copy.copy(self)
+        other.board = self.board.copy()
+        rng_class = type(self.rng)
+        other.rng = rng_class.__new__(rng_class)  # Без __init__: не тратим время на посев из os.urandom
+        other.rng.setstate(self.rng.getstate())
+        other.clearing_rows = list(self.clearing_rows)
+        other.pending_actions = deque(self.pending_actions)
+        other.recorder = None
+        return other
+
+    def new_piece(self): # Случайная фигура из пула текущего уровня (начальное положение)
+        return self.rng.choice(self.shapes.pool(self.level))
+
+    def check_collision(self, dx=0, dy=0, piece=None):
+        """
+        Проверяем столкновение фигуры с границами или другими блоками.
+        :param dx: смещение по X
+        :param dy: смещение по Y
+        :param piece: положение фигуры shapes.Rotation (по умолчанию текущее)
+        :return: True, если есть коллизия
+        """
+        return self.board.collides(piece or self.piece, self.x + dx, self.y + dy)
+
+    def move(self, dx=0, dy=0): # Сдвиг фигуры, если нет коллизии
+        if self.check_collision(dx=dx, dy=dy):
+            return False
+        self.x += dx
+        self.y += dy
+        return True
+
+    def rotate_piece(self): # Поворот фигуры, если нет коллизии
+        rotated = self.piece.next  # Поворот по часовой стрелке
+        if self.check_collision(piece=rotated):
+            return False
+        self.piece = rotated
+        return True
+
+    def hard_drop(self): # Сразу вниз, возвращает пройденное расстояние
+        distance = self.board.drop_distance(self.piece, self.x, self.y)
+        self.y += distance
+        return distance
+
+    @property
+    def ghost_y(self): # Строка, на которой фигура окажется после сброса (для тени)
+        return self.y + self.board.drop_distance(self.piece, self.x, self.y)
+
+    def lock_piece(self): # Фиксируем фигуру на поле и создаем новую
+        self.board.place(self.piece, self.x, self.y)
+        # Заполниться могли только строки, занятые фигурой
+        touched = range(max(self.y, 0), min(self.y + self.piece.height, self.rows))
+
+        if self.clear_delay:
+            lines = self.full_lines(touched)
+            if lines:
+                # Строки удалятся в update_clear() по истечении задержки
+                self.clearing_rows = lines
+                self.clear_timer = self.clear_delay
+                return 0
+        return self.spawn_next(self.clear_lines(touched))
+
+    def spawn_next(self, lines): # Начисляем очки за линии и выпускаем следующую фигуру
+        self.score += lines * 100
+        self.lines_cleared += lines
+        self.level = self.lines_cleared // self.lines_per_level + 1
+        self.fall_speed = max(self.fall_speed_min, self.fall_speed_base - self.level * self.fall_speed_step)
+
+        self.piece = self.next
+        self.next = self.new_piece()
+        self.x = self.piece.spawn_x
+        self.y = 0
+        self.fall_time = 0
+        self.lock_time = 0
+
+        if self.check_collision():
+            self.game_over = True
+        return lines
+
+    def full_lines(self, rows=None): # Номера заполненных строк (среди rows или всех)
+        return self.board.full_rows(rows)
+
+    def remove_lines(self, lines): # Удаляем строки, всё что выше сдвигается вниз
+        self.board.remove_rows(lines)
+
+    def clear_lines(self, rows=None):
+        """
+        Проверяет, очищает и возвращает количество линий.
+        :param rows: какие строки проверять (по умолчанию все)
+        """
+        lines_to_clear = self.full_lines(rows)
+        if lines_to_clear:
+            self.remove_lines(lines_to_clear)
+        return len(lines_to_clear)
+
+    def update_clear(self, dt):
+        """
+        Продвигает задержку очистки строк.
+        :param dt: прошедшее время в мс
+        :return: количество удалённых линий (0, пока задержка не истекла)
+        """
+        if not self.clearing_rows:
+            return 0
+        self.clear_timer -= dt
+        if self.clear_timer > 0:
+            return 0
+        lines = self.clearing_rows
+        self.clearing_rows = []
+        self.remove_lines(lines)
+        self.spawn_next(len(lines))
+        # Действия, нажатые во время анимации, применяем к новой фигуре
+        while self.pending_actions and not self.game_over:
+            self.apply(self.pending_actions.popleft())
+        self.pending_actions.clear()
+        return len(lines)
+
+    def gravity(self): # Шаг гравитации: вниз на клетку или фиксация
+        if self.clearing_rows:
+            return 0
+        if self.move(dy=1):
+            return 0
+        return self.lock_piece()
+
+    def apply(self, action):
+        """
+        Действие игрока. Во время очистки строк откладывается до её конца.
+        ACTION_DROP только сбрасывает фигуру вниз, фиксирует её гравитация.
+        :param action: одно из ACTION_*
+        """
+        if self.clearing_rows:
+            self.pending_actions.append(action)
+        elif action == ACTION_LEFT:
+            self.move(dx=-1)
+        elif action == ACTION_RIGHT:
+            self.move(dx=1)
+        elif action == ACTION_DOWN:
+            self.move(dy=1)
+        elif action == ACTION_ROTATE:
+            self.rotate_piece()
+        elif action == ACTION_DROP:
+            self.hard_drop()
+        elif action == ACTION_SOFT_DROP:
+            self.move(dy=1)
+            self.soft_drop = True
+            self.soft_drop_time = 0
+        elif action == ACTION_SOFT_DROP_END:
+            self.soft_drop = False
+
+    def handle_action(self, action):
+        """Действие игрока в реальном времени: пишется в повтор и применяется."""
+        if self.recorder is not None:
+            self.recorder.record(self.ticks, action)
+        self.apply(action)
+
+    def tick(self):
+        """
+        Один такт симуляции длиной TICK_MS: задержка очистки строк,
+        повтор мягкого сброса, гравитация и задержка фиксации.
+        :return: количество очищенных за такт линий
+        """
+        if self.game_over:
+            return 0
+        self.ticks += 1
+        if self.clearing_rows:
+            return self.update_clear(TICK_MS)
+        if self.soft_drop:
+            self.soft_drop_time += TICK_MS
+            if self.soft_drop_time >= SOFT_DROP_REPEAT:
+                self.soft_drop_time -= SOFT_DROP_REPEAT
+                self.move(dy=1)
+        self.fall_time += TICK_MS
+        if self.fall_time >= self.fall_speed:
+            self.fall_time -= self.fall_speed  # Остаток не теряется
+            if self.lock_delay is None:
+                return self.gravity()
+            self.move(dy=1)
+        if self.lock_delay is not None:
+            if self.check_collision(dy=1):
+                self.lock_time += TICK_MS
+                if self.lock_time >= self.lock_delay:
+                    return self.lock_piece()
+            else:
+                self.lock_time = 0
+        return 0
+
+    def step(self, action):
+        """
+        Один шаг симуляции: действие и затем шаг гравитации.
+        ACTION_DROP сбрасывает фигуру и сразу фиксирует её.
+        :param action: одно из ACTION_*
+        :return: количество очищенных за шаг линий
+        """
+        if self.game_over:
+            return 0
+        self.apply(action)
+        if action == ACTION_DROP and not self.clearing_rows:
+            return self.lock_piece()
+        return self.gravity()
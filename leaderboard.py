@@ -0,0 +1,233 @@
+"""Таблица рекордов.
+
+Каждый результат дописывается строкой JSON в конец журнала records.log -
+файл никогда не переписывается при сохранении. В памяти держатся только
+лучшие TOP_N результатов (куча ограниченного размера), лучший результат
+каждого игрока и число результатов с каждым количеством очков.
+
+Снимок этого состояния вместе со смещением в журнале лежит в индексе
+records.idx, поэтому при запуске читается только хвост журнала, дописанный
+после снимка. Индекс и сжатый журнал пишутся во временный файл, который
+затем атомарно подменяет старый: при сбое остаётся целая прежняя версия.
+
+Старый records.txt переносится в журнал при первом запуске.
+    python leaderboard.py               # топ-10
+    python leaderboard.py --player Nord # лучший результат и место игрока
+    python leaderboard.py --compact     # оставить в журнале лучшие результаты игроков
+"""
+import argparse
+import heapq
+import json
+import os
+
+LOG_FILE = "records.log"
+INDEX_FILE = "records.idx"
+LEGACY_FILE = "records.txt"
+TOP_N = 10
+INDEX_EVERY = 1000  # Через сколько новых результатов обновлять индекс
+INDEX_VERSION = 2  # 2: в индексе записан top_n
+
+
+def atomic_write(path, data):
+    """Записывает байты во временный файл рядом и подменяет им path."""
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def encode(name, score): # Строка журнала; имя может содержать любые символы
+    return (json.dumps([name, score], ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def read_legacy(path):
+    """Результаты из старого records.txt (строки вида 'имя: очки')."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            name, sep, score = line.rstrip("\n").rpartition(": ")
+            if not sep:
+                continue
+            try:
+                records.append((name, int(score)))
+            except ValueError:
+                continue
+    return records
+
+
+class Leaderboard:
+    def __init__(self, path=LOG_FILE, index_path=INDEX_FILE, top_n=TOP_N,
+                 index_every=INDEX_EVERY, legacy_path=LEGACY_FILE):
+        """
+        :param path: журнал результатов
+        :param index_path: файл индекса
+        :param top_n: сколько лучших результатов держать в памяти
+        :param index_every: через сколько новых результатов обновлять индекс
+        :param legacy_path: старый records.txt для переноса или None
+        """
+        self.path = path
+        self.index_path = index_path
+        self.top_n = top_n
+        self.index_every = index_every
+        if legacy_path and not os.path.exists(path) and os.path.exists(legacy_path):
+            self.migrate(legacy_path)
+        self.load()
+
+    def reset(self):
+        self.heap = []    # (очки, -номер, имя): на вершине худший из лучших
+        self.bests = {}   # Имя -> [лучшие очки, номер результата]
+        self.counts = {}  # Очки -> сколько раз набраны
+        self.count = 0    # Всего результатов
+        self.offset = 0   # До какого байта журнала учтены результаты
+        self.pending = 0  # Результаты, которых ещё нет в индексе
+
+    def load(self):
+        """Снимок из индекса, затем хвост журнала после него."""
+        self.reset()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            # Индекс с меньшим топом не знает нужных результатов - тогда читаем журнал
+            if (index["version"] == INDEX_VERSION and index["offset"] <= size
+                    and index["top_n"] >= self.top_n):
+                # Больший топ (например, сохранённый из командной строки) урезаем
+                self.heap = heapq.nlargest(self.top_n, (tuple(item) for item in index["top"]))
+                heapq.heapify(self.heap)
+                self.bests = index["bests"]
+                self.counts = {score: count for score, count in index["counts"]}
+                self.count = index["count"]
+                self.offset = index["offset"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()  # Индекса нет или он испорчен - читаем журнал целиком
+        if size > self.offset:
+            self.read_tail(size)
+        if self.pending >= self.index_every:
+            self.save_index()
+
+    def read_tail(self, size):
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Оборванная при сбое запись
+                self.offset += len(line)
+                try:
+                    name, score = json.loads(line)
+                    score = int(score)
+                    if not isinstance(name, str):
+                        raise TypeError("имя не строка")
+                except (ValueError, TypeError):
+                    continue  # Испорченная строка пропускается, как в read_legacy
+                self.pending += 1
+                self.track(name, score)
+        if self.offset < size:
+            with open(self.path, "r+b") as f:
+                f.truncate(self.offset)  # Следующая запись начнётся с новой строки
+
+    def track(self, name, score):
+        """Учитывает результат в памяти."""
+        number = self.count
+        self.count += 1
+        item = (score, -number, name)  # При равных очках выше тот, кто раньше
+        if len(self.heap) < self.top_n:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+        best = self.bests.get(name)
+        if best is None or score > best[0]:
+            self.bests[name] = [score, number]
+        self.counts[score] = self.counts.get(score, 0) + 1
+
+    def add(self, name, score):
+        """Дописывает результат в журнал."""
+        line = encode(name, score)
+        with open(self.path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.offset += len(line)
+        self.pending += 1
+        self.track(name, score)
+        if self.pending >= self.index_every:
+            self.save_index()
+
+    def save_index(self):
+        index = {
+            "version": INDEX_VERSION,
+            "top_n": self.top_n,
+            "offset": self.offset,
+            "count": self.count,
+            "top": self.heap,
+            "bests": self.bests,
+            "counts": list(self.counts.items()),
+        }
+        atomic_write(self.index_path, json.dumps(index, ensure_ascii=False).encode("utf-8"))
+        self.pending = 0
+
+    def close(self): # Сохраняет индекс, чтобы следующий запуск не читал журнал
+        if self.pending:
+            self.save_index()
+
+    def compact(self):
+        """
+        Сжимает журнал: остаётся лучший результат каждого игрока в прежнем порядке.
+        Лучшие результаты игроков не меняются, топ и места считаются среди оставшихся.
+        """
+        bests = sorted(self.bests.items(), key=lambda item: item[1][1])
+        atomic_write(self.path, b"".join(encode(name, score) for name, (score, _) in bests))
+        self.reset()
+        self.read_tail(os.path.getsize(self.path))
+        self.save_index()
+
+    def migrate(self, legacy_path):
+        """Переносит результаты из records.txt в журнал."""
+        records = read_legacy(legacy_path)
+        atomic_write(self.path, b"".join(encode(name, score) for name, score in records))
+
+    def top(self, n=None):
+        """Лучшие результаты [(имя, очки)], не больше top_n."""
+        items = sorted(self.heap, reverse=True)[:n]
+        return [(name, score) for score, _, name in items]
+
+    def best(self, name=None):
+        """Лучшие очки игрока или всей таблицы; 0, если результатов нет."""
+        if name is not None:
+            best = self.bests.get(name)
+            return best[0] if best else 0
+        return max(self.heap)[0] if self.heap else 0
+
+    def rank(self, score):
+        """Место, которое занял бы результат (1 - лучший)."""
+        return 1 + sum(count for value, count in self.counts.items() if value > score)
+
+    def __len__(self):
+        return self.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Таблица рекордов")
+    parser.add_argument("--log", default=LOG_FILE, help="журнал результатов")
+    parser.add_argument("--index", default=INDEX_FILE, help="файл индекса")
+    parser.add_argument("--top", type=int, default=TOP_N, help="сколько лучших показать")
+    parser.add_argument("--player", help="лучший результат и место игрока")
+    parser.add_argument("--compact", action="store_true", help="оставить лучшие результаты игроков")
+    args = parser.parse_args(argv)
+    board = Leaderboard(args.log, args.index, top_n=max(args.top, TOP_N))
+    if args.compact:
+        before = len(board)
+        board.compact()
+        print(f"Журнал сжат: {before} -> {len(board)} результатов")
+    if args.player:
+        score = board.best(args.player)
+        print(f"{args.player}: {score}, место {board.rank(score)} из {len(board)}")
+    else:
+        for place, (name, score) in enumerate(board.top(args.top), 1):
+            print(f"{place:>3}. {name}: {score}")
+    board.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,183 +1,222 @@
+import sys
+import time
+
+from timing import StartupTimer
+
+STARTUP = StartupTimer(budget_ms=1000)  # Время от запуска до первого игрового кадра
+
+if __name__ == "__main__":
+    # pygame при импорте подгружает NumPy (для surfarray) и pkg_resources (для
+    # встроенных ресурсов); игре они не нужны, а занимают большую часть запуска.
+    # Без них pygame обходится сам, поэтому при запуске игры их не импортируем
+    sys.modules.setdefault("numpy", None)
+    sys.modules.setdefault("pkg_resources", None)
+
 import pygame
-import random
+import argparse
+import math
 import os
+import random
 
-# Инициализация Pygame
-pygame.init()
-pygame.mixer.init()  # Для звука
+from engine import (TetrisEngine, ROWS, COLS, TICK_MS, ACTION_LEFT, ACTION_RIGHT,
+                    ACTION_ROTATE, ACTION_DROP, ACTION_SOFT_DROP, ACTION_SOFT_DROP_END)
+from renderer import BoardRenderer, make_tile
+from textcache import TextCache
+from timing import FixedTimestep, MAX_STEPS
+from assets import Assets
+from audio import AudioManager
+from replay import ReplayWriter, ReplayFeeder, load as load_replay
+from leaderboard import Leaderboard
+import savestate
+from profiler import (FrameProfiler, NullProfiler, EVENTS, INPUT, UPDATE, DRAW_BOARD,
+                      DRAW_FLASH, DRAW_PANEL, OVERLAY, DISPLAY, WAIT)
 
 # Константы
-SCREEN_WIDTH = 300
-SCREEN_HEIGHT = 600
 BLOCK_SIZE = 30
-ROWS = SCREEN_HEIGHT // BLOCK_SIZE
-COLS = SCREEN_WIDTH // BLOCK_SIZE
-FPS = 60
+SCREEN_WIDTH = COLS * BLOCK_SIZE
+SCREEN_HEIGHT = ROWS * BLOCK_SIZE
+# Большие поля показываются в окне не больше этого размера (пиксели), клавиши [ и ]
+# меняют масштаб на следующий из BLOCK_SIZES
+MAX_VIEW_WIDTH = 900
+MAX_VIEW_HEIGHT = SCREEN_HEIGHT
+BLOCK_SIZES = (30, 24, 18, 12, 8, 6, 4, 3, 2)
+FPS = 60  # Ограничение частоты кадров по умолчанию (0 - без ограничения)
+TURBO_TICKS = 1000  # Тактов симуляции за проход цикла в турбо-режиме
+OVERLAY_INTERVAL = 250  # Как часто обновлять оверлей замеров, мс
+OVERLAY_FRAMES = 120  # По скольким последним кадрам считать оверлей
 
 # Цвета
 BACKGROUND_COLOR = (10, 10, 10)
 MALINA_COLOR = (255, 0, 128)  # Малиновый цвет
 GRID_COLOR = (50, 50, 50)
 NEXT_PIECE_BG = (30, 30, 30)
-
-# Фигуры (тетромино)
-SHAPES_1 = [ # Фигуры начальной сложности
-    [[1]],                   # 1 I-образная
-    [[1, 1]],                # 2 I-образная
-    [[1, 1, 1]],             # 3 I-образная
-    [[0, 1, 0], [1, 1, 1]],  # 4 T-маленькая
-    [[1, 0, 0], [1, 1, 1]],  # 4 L-образная
-    [[0, 0, 1], [1, 1, 1]],  # 4 J-образная
-    [[1, 1], [1, 1]],        # 4 O-образная
-]
-SHAPES_2 = [ # Фигуры 2
-    [[1, 1, 0], [0, 1, 1]],  # 4 Z-образная
-    [[0, 1, 1], [1, 1, 0]],  # 4 S-образная
-]
-SHAPES_3 = [ # Фигуры 3
-    [[1, 1, 1, 1]],          # 4 I-образная
-    [[1, 1, 1, 1, 1]],       # 5 I-образная
-]
-SHAPES_4 = [ # Фигуры 4
-    [[0, 1, 0], [0, 1, 0], [1, 1, 1]],  # 5 Т-большая
-]
-SHAPES_5 = [ # Фигуры 5
-    [[1, 1], [1, 1], [1, 0]],  # 5 6-образная
-    [[1, 1], [1, 1], [0, 1]],  # 5 d-образная
-]
-SHAPES_6 = [ # Фигуры 6
-    [[1, 0, 1], [1, 1, 1]],    # 5 П-образная
-]
-SHAPES_7 = [ # Фигуры 7
-    [[1, 0, 0], [1, 0, 0], [1, 1, 1]],   # 5 Г-образная
-]
-SHAPES_8 = [ # Фигуры 8
-    [[1, 1, 0], [0, 1, 0], [0, 1, 1]],   # 5 3-образная
-]
-SHAPES_9 = [ # Фигуры 9
-    [[1, 1, 1, 1], [0, 0, 0, 1]],   # 5 Г-длинная
-    [[1, 1, 1, 1], [1, 0, 0, 0]],   # 5 L-длинная
-]
-SHAPES_10 = [ # Фигуры 10
-    [[1, 1, 1, 0], [0, 0, 1, 1]],   # 5 Z-длинная
-    [[0, 1, 1, 1], [1, 1, 0, 0]],   # 5 S-длинная
-]
-
-# Загрузка звуков
-try:
-    sound_path = os.path.dirname(__file__)
-    move_sound = pygame.mixer.Sound(os.path.join(sound_path, "move.wav"))
-    clear_sound = pygame.mixer.Sound(os.path.join(sound_path, "line_clear.wav"))
-    game_over_sound = pygame.mixer.Sound(os.path.join(sound_path, "game_over.wav"))
-    pygame.mixer.music.load(os.path.join(sound_path, "background.mp3"))
-    pygame.mixer.music.play(-1)  # Бесконечное воспроизведение фона
-except Exception as e:
-    print("Не удалось загрузить звуки:", e)
-
-
-class TetrisGame:
-    def __init__(self):
-        # Инициализация игрового окна и начальных параметров
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH + 400, SCREEN_HEIGHT))
+GHOST_COLOR = (70, 0, 35)  # Тень фигуры - место, куда она упадёт
+
+# Анимация очистки строк: три вспышки по кругу цветов, смена цвета каждые 60 мс
+FLASH_COLORS = [MALINA_COLOR, (255, 100, 180), (255, 200, 230)]
+FLASH_FRAME = 60
+CLEAR_DELAY = 3 * len(FLASH_COLORS) * FLASH_FRAME
+
+# Клавиши управления фигурой
+KEY_ACTIONS = {
+    pygame.K_LEFT: ACTION_LEFT,
+    pygame.K_RIGHT: ACTION_RIGHT,
+    pygame.K_DOWN: ACTION_SOFT_DROP,
+    pygame.K_UP: ACTION_ROTATE,
+    pygame.K_SPACE: ACTION_DROP,
+}
+
+# Клавиши громкости: категория звука и шаг
+VOLUME_KEYS = {
+    pygame.K_PLUS: ("music", 0.1),
+    pygame.K_EQUALS: ("music", 0.1),
+    pygame.K_MINUS: ("music", -0.1),
+    pygame.K_e: ("move", 0.1),
+    pygame.K_w: ("move", -0.1),
+    pygame.K_f: ("clear", 0.1),
+    pygame.K_d: ("clear", -0.1),
+    pygame.K_v: ("over", 0.1),
+    pygame.K_c: ("over", -0.1),
+}
+
+# Папка со звуками и музыкой; они грузятся в фоне при создании игры, до этого звучат заглушки
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP.mark("import")
+
+
+class TetrisGame(TetrisEngine):
+    def __init__(self, fps=FPS, vsync=False, turbo=False, lock_delay=None, seed=None,
+                 record_dir=None, replay=None, speed=1.0, profile=False, profile_out=None,
+                 audio_buffer=512, rows=ROWS, cols=COLS):
+        # fps - ограничение частоты кадров (0 - без ограничения)
+        # vsync - синхронизация с обновлением экрана
+        # turbo - симуляция без отрисовки на максимальной скорости
+        # lock_delay - задержка фиксации фигуры в мс (None - по гравитации)
+        # seed - сид партии (по умолчанию случайный)
+        # record_dir - папка, куда записывать повтор партии
+        # replay - файл повтора для просмотра вместо игры, speed - его скорость
+        # profile - замерять фазы кадра, profile_out - куда выгрузить замеры при выходе
+        # audio_buffer - буфер микшера в сэмплах (меньше - меньше задержка звука)
+        # rows, cols - размеры поля (у повтора берутся из файла)
+        if not 0 < speed < math.inf:
+            raise ValueError(f"скорость должна быть больше нуля, а не {speed}")
+        self.record_dir = record_dir  # Нужна и при перезапуске партии
+        self.fps = fps
+        self.turbo = turbo
+        self.profiler = FrameProfiler() if profile or profile_out else NullProfiler()
+        self.profile_out = profile_out
+        self.overlay = False  # Оверлей замеров (F3)
+        self.overlay_time = 0
+
+        # Инициализация игрового окна и начальных параметров; звук и шрифты
+        # тем временем готовятся в фоне, остальные модули pygame не нужны
+        pygame.display.init()
+        # Звуки свои у каждой игры: после pygame.quit() загруженные Sound уже не работают
+        self.audio = AudioManager(Assets(ASSET_DIR), buffer=audio_buffer)  # Каналы, голоса и громкость звуков
+        self.audio.start()
+        replay_data = load_replay(replay) if replay else None
+        if replay_data:
+            rows, cols = replay_data[0].rows, replay_data[0].cols
+        view_width = min(cols * BLOCK_SIZE, MAX_VIEW_WIDTH)
+        view_height = min(rows * BLOCK_SIZE, MAX_VIEW_HEIGHT)
+        size = (view_width + 400, max(view_height, SCREEN_HEIGHT))
+        if vsync:
+            self.screen = pygame.display.set_mode(size, pygame.SCALED, vsync=1)
+        else:
+            self.screen = pygame.display.set_mode(size)
         pygame.display.set_caption("Малиновый Тетрис")
         self.clock = pygame.time.Clock()
-
-        self.music_volume = 0.5 # Громкость музыки
-        self.move_volume = 0.5 # Громкость кнопок управления блоками
-        self.clear_volume = 0.8  # Громкость исчезающих строк
-        self.over_volume = 0.5   # Громкость конца игры
-        pygame.mixer.music.set_volume(self.music_volume)
-        move_sound.set_volume(self.move_volume)
-        clear_sound.set_volume(self.clear_volume)
-        game_over_sound.set_volume(self.over_volume)
-
-        # Создаём пустую сетку (игровое поле)
-        self.grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+        # Такты симуляции отдельно от кадров; на ускоренном повторе тактов за кадр
+        # больше, иначе потолок max_steps замедлял бы показ
+        self.timestep = FixedTimestep(TICK_MS / speed, max_steps=math.ceil(MAX_STEPS * max(speed, 1)))
+        STARTUP.mark("window")
 
         # Создаем рекорды
-        self.record = 0
-        self.records = []
-        self.load_record()  # ← Здесь загружаем рекорд
-        self.best_score = self.get_best_record() # получаем лучший рекорд
-
-        self.level_tresh = {
-            1: SHAPES_1,
-            2: SHAPES_1 + SHAPES_2,
-            3: SHAPES_1 + SHAPES_2 + SHAPES_3,
-            4: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4,
-            5: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5,
-            6: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6,
-            7: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7,
-            8: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7 + SHAPES_8,
-            9: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7 + SHAPES_8 + SHAPES_9,
-            10: SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7 + SHAPES_8 + SHAPES_9 + SHAPES_10
-        }
-
-        self.score = 0
-        self.level = 1
-        self.lines_cleared = 0
-        self.fall_speed = 1000
-        self.fall_time = 0
-
-        self.current_piece = self.new_piece()
-        self.next_piece = self.new_piece()
-        self.x = COLS // 2 - len(self.current_piece[0]) // 2
-        self.y = 0
-        self.game_over = False
-
-
-
-    def load_record(self): # Загружаем рекорды из файла
-        self.records = []
-        if os.path.exists("records.txt"):
-            with open("records.txt", "r") as f:
-                lines = f.readlines()
-                for line in lines:
-                    if ": " in line:
-                        name, score = line.strip().split(": ")
-                        try:
-                            self.records.append((name, int(score)))
-                        except ValueError:
-                            continue
-            self.records.sort(key=lambda x: x[1], reverse=True)
-
-    def get_best_record(self): # Лучший рекорд
-        if self.records:
-            return self.records[0][1]
+        self.leaderboard = Leaderboard()
+        self.best_score = self.leaderboard.best() # получаем лучший рекорд
+
+        # Игровое поле, фигуры и счёт; заполненные строки мигают CLEAR_DELAY мс
+        self.feeder = None
+        if replay_data:
+            # Параметры партии берём из повтора, действия подаются по тактам
+            header, records = replay_data
+            super().__init__(seed=header.seed, clear_delay=header.clear_delay,
+                             lock_delay=header.lock_delay, lines_per_level=header.lines_per_level,
+                             fall_speed_base=header.fall_speed_base,
+                             fall_speed_step=header.fall_speed_step,
+                             fall_speed_min=header.fall_speed_min, rows=rows, cols=cols)
+            self.feeder = ReplayFeeder(records)
         else:
-            return 0
-
-    def load_record(self): # Загружаем рекорды из файла
-        self.records = []
-        if os.path.exists("records.txt"):
-            with open("records.txt", "r") as f:
-                lines = f.readlines()
-                for line in lines:
-                    if ": " in line:
-                        name, score_str = line.strip().split(": ")
-                        try:
-                            score = int(score_str)
-                            self.records.append((name, score))
-                        except ValueError:
-                            continue
-        self.records.sort(key=lambda x: x[1], reverse=True)
-
-    def save_record(self, name="Player", top_n = 10): # Добавление нового рекорда в топ 10
-        self.load_record()  # ← Загружаем старые рекорseды перед добавлением
-        self.records.append((name, self.score))
-        self.records.sort(key=lambda x: x[1], reverse=True)
-        with open("records.txt", "w") as f:
-            for name, score in self.records[:10]:  # Сохраняем топ-10
-                f.write(f"{name}: {score}\n")
+            super().__init__(seed=seed, clear_delay=CLEAR_DELAY, lock_delay=lock_delay,
+                             rows=rows, cols=cols)
+            self.start_recording()
+        self.replay_records = replay_data and replay_data[1]
+        self.slot = 1  # Слот сохранения в меню паузы
+
+        # Поле рисуется по изменившимся областям окна просмотра, панель справа -
+        # при смене значений
+        self.renderer = BoardRenderer(self.screen, rows, cols, BLOCK_SIZE, MALINA_COLOR,
+                                      BACKGROUND_COLOR, GRID_COLOR, (view_width, view_height),
+                                      GHOST_COLOR)
+        self.panel_rect = pygame.Rect(view_width, 0, 400, size[1])
+        self.panel_key = None
+        self.overlay_rect = pygame.Rect(view_width + 10, 450, 380, 60)
+        self.next_tile = make_tile(MALINA_COLOR, GRID_COLOR, BLOCK_SIZE)  # Не зависит от масштаба
+        self.text = TextCache()  # Шрифты и готовые надписи
+        STARTUP.mark("init")
+
+    def start_recording(self): # Повтор новой партии, если задана папка record_dir
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            name = time.strftime("%Y%m%d-%H%M%S") + f"-{self.seed}.ztr"
+            self.recorder = ReplayWriter(os.path.join(self.record_dir, name), self)
+
+    def stop_recording(self): # Итоговые очки - в конец повтора
+        if self.recorder:
+            self.recorder.close(self)
+            self.recorder = None
+
+    def restart(self):
+        """Новая партия в том же окне: окно, шрифты, звук и рекорды остаются."""
+        self.stop_recording()
+        if self.feeder:
+            self.reset(seed=self.seed)  # Повтор показывается сначала
+            self.feeder = ReplayFeeder(self.replay_records)
+        else:
+            self.reset(seed=random.randrange(2 ** 32))
+            self.start_recording()
+        self.best_score = self.leaderboard.best()
+        self.invalidate_screen()
+        self.timestep.reset()
+
+    def save_slot(self): # Снимок партии в текущий слот
+        savestate.save(self.snapshot(), self.slot)
+
+    def load_slot(self):
+        """Восстанавливает партию из текущего слота; False, если он пуст или не подходит."""
+        state = savestate.load(self.slot)
+        if state is None:
+            return False
+        try:
+            self.check_state(state)  # До остановки повтора и до изменения поля
+        except ValueError as e:
+            print(f"Сохранение в слоте {self.slot} не подходит:", e)
+            return False
+        self.stop_recording()  # Повтор не может продолжиться с другого состояния
+        self.restore(state)
+        self.invalidate_screen()
+        return True
+
+    def save_record(self, name="Player"): # Дописываем результат в таблицу рекордов
+        self.leaderboard.add(name, self.score)
 
     def input_name_screen(self):
-        font = pygame.font.SysFont("Arial", 24)
         input_text = ""
         typing = True
         while typing:
             self.screen.fill(BACKGROUND_COLOR)
-            prompt = font.render("Введите имя:", True, MALINA_COLOR)
-            text = font.render(input_text + "_", True, (255, 255, 255))
+            prompt = self.text.render("Введите имя:", MALINA_COLOR, 24)
+            text = self.text.render(input_text + "_", (255, 255, 255), 24)
             self.screen.blit(prompt, (50, SCREEN_HEIGHT // 2 - 60))
             self.screen.blit(text, (50, SCREEN_HEIGHT // 2))
             pygame.display.flip()
@@ -195,216 +234,147 @@ class TetrisGame:
 
         self.save_record(input_text or "Anon")
 
-    def new_piece(self): # Создатm случайную фигуру в зависимости от текущего уровня
-        if self.level >= 10:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7 + SHAPES_8 + SHAPES_9 + SHAPES_10
-        elif self.level >= 9:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7 + SHAPES_8 + SHAPES_9
-        elif self.level >= 8:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7 + SHAPES_8
-        elif self.level >= 7:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6 + SHAPES_7
-        elif self.level >= 6:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5 + SHAPES_6
-        elif self.level >= 5:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4 + SHAPES_5
-        elif self.level >= 4:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3 + SHAPES_4
-        elif self.level >= 3:
-            available_shapes = SHAPES_1 + SHAPES_2 + SHAPES_3
-        elif self.level >= 2:
-            available_shapes = SHAPES_1 + SHAPES_2
-        else:
-            available_shapes = SHAPES_1
-
-        return [[1 if cell else 0 for cell in row] for row in random.choice(available_shapes)]
-
     def draw_grid(self):
         """Рисует текущее состояние игрового поля (сетку с заполненными блоками)."""
-        for row in range(len(self.grid)):
-            for col in range(COLS):
-                color = MALINA_COLOR if self.grid[row][col] else BACKGROUND_COLOR
-                pygame.draw.rect(self.screen, color,
-                                 (col * BLOCK_SIZE, row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-                pygame.draw.rect(self.screen, GRID_COLOR,
-                                 (col * BLOCK_SIZE, row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 1)
-
-    def draw_grid_with_flash(self, lines, flash_color):
-        """Рисует сетку с подсветкой указанных строк."""
-        for row in range(len(self.grid)):
-            for col in range(COLS):
-                if row in lines:
-                    pygame.draw.rect(self.screen, flash_color,
-                                     (col * BLOCK_SIZE, row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-                else:
-                    color = MALINA_COLOR if self.grid[row][col] else BACKGROUND_COLOR
-                    pygame.draw.rect(self.screen, color,
-                                     (col * BLOCK_SIZE, row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-                pygame.draw.rect(self.screen, GRID_COLOR,
-                                 (col * BLOCK_SIZE, row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 1)
+        self.renderer.sync(self.board)
+        self.renderer.draw_board()
 
     def draw_piece(self, piece=None, offset_x=0, offset_y=0):
         """Рисует указанную фигуру по заданным координатам."""
         piece = piece or self.current_piece
-        for row in range(len(piece)):
-            for col in range(len(piece[0])):
-                if piece[row][col]:
-                    pygame.draw.rect(self.screen, MALINA_COLOR,
-                                     ((self.x + col + offset_x) * BLOCK_SIZE,
-                                      (self.y + row + offset_y) * BLOCK_SIZE,
-                                      BLOCK_SIZE, BLOCK_SIZE))
-                    pygame.draw.rect(self.screen, GRID_COLOR,
-                                     ((self.x + col + offset_x) * BLOCK_SIZE,
-                                      (self.y + row + offset_y) * BLOCK_SIZE,
-                                      BLOCK_SIZE, BLOCK_SIZE), 1)
-
-    def check_collision(self, dx=0, dy=0, piece=None):
-        """
-        Проверяем столкновение фигуры с границами или другими блоками.
-        :param dx: смещение по X
-        :param dy: смещение по Y
-        :param piece: текущая фигура (можно передать другую)
-        :return: True, если есть коллизия
-        """
-        piece = piece or self.current_piece
-        for row in range(len(piece)):
-            for col in range(len(piece[0])):
-                if piece[row][col]:
-                    new_x = self.x + col + dx
-                    new_y = self.y + row + dy
-                    if new_x < 0 or new_x >= COLS or new_y >= ROWS or self.grid[new_y][new_x]:
-                        return True
-        return False
-
-    def lock_piece(self): # Фиксим фигуру на поле и создаем новую
-        for row in range(len(self.current_piece)):
-            for col in range(len(self.current_piece[0])):
-                if self.current_piece[row][col]:
-                    self.grid[self.y + row][self.x + col] = 1
-
-        lines = self.clear_lines()
-        print(f"Очищено линий: {lines}")
-        self.score += lines * 100
-        self.lines_cleared += lines
-        self.level = self.lines_cleared // 10 + 1
-        self.fall_speed = max(200, 1000 - self.level * 70)
-
-        self.current_piece = self.next_piece
-        self.next_piece = self.new_piece()
-        self.x = COLS // 2 - len(self.current_piece[0]) // 2
-        self.y = 0
-
-        if self.check_collision():
-            self.game_over = True
-
-    def animate_lines_cleared(self, lines):
-        """Анимация вспышки перед удалением строк."""
-        print(f"Анимация строк: {lines}")
-        # Цвета для анимации
-        flash_colors = [MALINA_COLOR, (255, 100, 180), (255, 200, 230)]
-
-        for _ in range(3):  # Три вспышки
-            for color in flash_colors:
-                self.screen.fill(BACKGROUND_COLOR)
-                self.draw_grid_with_flash(lines, color)
-                self.draw_next_piece()
-                self.draw_score()
-                pygame.display.flip()
-                pygame.time.delay(60)  # Время между кадрами анимации
-
-        # Удаление строк после анимации
-        for row in sorted(lines, reverse=False):
-            del self.grid[row]
-            self.grid.insert(0, [0 for _ in range(COLS)])
-
-        try:
-            clear_sound.play()
-        except:
-            pass
-
-    def clear_lines(self):
-        """Проверяет, очищает и возвращает количество линий."""
-        lines_to_clear = [row for row in range(len(self.grid)) if all(self.grid[row])]
-        if lines_to_clear:
-            self.animate_lines_cleared(lines_to_clear)
-        return len(lines_to_clear)
-
-    def rotate_piece(self): # Поворот фигуры, если нет коллизии
-        rotated = list(zip(*self.current_piece[::-1]))  # Поворот матрицы
-        if not self.check_collision(piece=rotated):
-            self.current_piece = rotated
-            try:
-                move_sound.play()
-            except:
-                pass
+        return self.renderer.draw_piece(piece, self.x + offset_x, self.y + offset_y)
+
+    def draw_flash(self):
+        """Кадр вспышки очищаемых строк, рисуется прямо в игровом цикле."""
+        elapsed = self.clear_delay - self.clear_timer
+        color = FLASH_COLORS[int(elapsed // FLASH_FRAME) % len(FLASH_COLORS)]
+        return self.renderer.draw_rows(self.clearing_rows, color)
+
+    def remove_lines(self, lines): # Удаление строк после вспышки и звук
+        super().remove_lines(lines)
+        self.audio.play("clear")
+
+    def move(self, dx=0, dy=0): # Сдвиг фигуры, в стороны - со звуком
+        moved = super().move(dx, dy)
+        if moved and dx:
+            self.audio.play("move")
+        return moved
+
+    def rotate_piece(self): # Поворот фигуры со звуком
+        rotated = super().rotate_piece()
+        if rotated:
+            self.audio.play("move")
+        return rotated
 
     def hard_drop(self): # Сразу вниз
-        while not self.check_collision(dy=1):
-            self.y += 1
-        try:
-            move_sound.play()
-        except:
-            pass
+        distance = super().hard_drop()
+        self.audio.play("move")
+        return distance
 
     def draw_next_piece(self): # показываем следующую фигуру справа
-        x_offset = COLS * BLOCK_SIZE + 10
+        x_offset = self.panel_rect.x + 10
         y_offset = 10
         pygame.draw.rect(self.screen, NEXT_PIECE_BG, (x_offset, y_offset, 150, 150))
-        for row in range(len(self.next_piece)):
-            for col in range(len(self.next_piece[0])):
-                if self.next_piece[row][col]:
-                    pygame.draw.rect(self.screen, MALINA_COLOR,
-                                     (x_offset + col * BLOCK_SIZE,
-                                      y_offset + row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-                    pygame.draw.rect(self.screen, GRID_COLOR,
-                                     (x_offset + col * BLOCK_SIZE,
-                                      y_offset + row * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 1)
+        tile = self.next_tile
+        self.screen.blits([(tile, (x_offset + col * BLOCK_SIZE, y_offset + row * BLOCK_SIZE))
+                           for row, line in enumerate(self.next_piece)
+                           for col, cell in enumerate(line) if cell], False)
+
+    def draw_panel(self):
+        """Перерисовывает панель справа, только если показанные на ней значения изменились."""
+        key = (self.next_piece, self.score, self.level, self.lines_cleared, self.best_score,
+               tuple(self.audio.volumes.values()))
+        if key == self.panel_key:
+            return []
+        self.panel_key = key
+        self.screen.fill(BACKGROUND_COLOR, self.panel_rect)
+        self.draw_next_piece()
+        self.draw_score()
+        return [self.panel_rect]
+
+    def draw_overlay(self, force=False):
+        """Оверлей замеров под панелью; обновляется раз в OVERLAY_INTERVAL мс."""
+        now = pygame.time.get_ticks()
+        if not force and now - self.overlay_time < OVERLAY_INTERVAL:
+            return []
+        self.overlay_time = now
+        self.screen.fill(BACKGROUND_COLOR, self.overlay_rect)
+        stats = self.profiler.stats(OVERLAY_FRAMES)
+        if stats:
+            lines = [f"FPS: {stats['fps']:.0f}",
+                     f"Кадр p50/p95/p99: {stats['p50']:.1f}/{stats['p95']:.1f}/{stats['p99']:.1f} мс",
+                     f"Дольше всего: {stats['slowest']} {stats['slowest_ms']:.2f} мс"]
+            for i, line in enumerate(lines):
+                text = self.text.render(line, (120, 255, 120))
+                self.screen.blit(text, (self.overlay_rect.x, self.overlay_rect.y + i * 20))
+        return [self.overlay_rect]
+
+    def export_profile(self): # Выгрузка замеров в <profile_out>.csv и <profile_out>.json
+        if self.profile_out and self.profiler.frames:
+            self.profiler.export_csv(self.profile_out + ".csv")
+            self.profiler.export_trace(self.profile_out + ".json")
+            print(f"Замеры кадров: {self.profile_out}.csv, {self.profile_out}.json")
+
+    def zoom(self, step):
+        """Следующий (step=1 - мельче) или предыдущий масштаб поля из BLOCK_SIZES."""
+        size = self.renderer.block_size
+        index = min(range(len(BLOCK_SIZES)), key=lambda i: abs(BLOCK_SIZES[i] - size))
+        index = max(0, min(index + step, len(BLOCK_SIZES) - 1))
+        self.renderer.set_block_size(BLOCK_SIZES[index])
+
+    def invalidate_screen(self): # Экран был затёрт - следующий кадр рисуем целиком
+        self.renderer.invalidate()
+        self.panel_key = None
 
     def draw_score(self):
         """Отображает текущие очки, уровень и количество удалённых линий."""
-        font = pygame.font.SysFont("Arial", 18)
-        score_text = font.render(f"Очки: {self.score}", True, (255, 255, 255))
-        level_text = font.render(f"Уровень: {self.level}", True, (255, 255, 255))
-        lines_text = font.render(f"Линии: {self.lines_cleared}", True, (255, 255, 255))
-        music_volume_text = font.render(f"Громкость музыки: {int(self.music_volume * 100)}%", True, (255, 255, 255))
-        m_v_text = font.render(f"повысить: + понизить: -",True, (255, 255, 255))
-        move_volume_text = font.render(f"Громкость кнопок: {int(self.move_volume * 100)}%", True, (255, 255, 255))
-        move_v_text = font.render(f"повысить: e понизить: w", True,(255, 255, 255))
-        clear_volume_text = font.render(f"Громкость стирания линий: {int(self.clear_volume * 100)}%", True, (255, 255, 255))
-        c_v_text = font.render(f"повысить: f понизить: d", True, (255, 255, 255))
-        over_volume_text = font.render(f"Громкость завершения: {int(self.over_volume * 100)}%", True, (255, 255, 255))
-        o_v_text = font.render(f"повысить: v понизить: c", True, (255, 255, 255))
-        record_text = font.render(f"Рекорд: {self.best_score}", True, MALINA_COLOR)
-        pause_text = font.render(f"Пауза - P", True, (255, 255, 255))
-        self.screen.blit(record_text, (COLS * BLOCK_SIZE + 10, 170))
-        self.screen.blit(score_text, (COLS * BLOCK_SIZE + 10, 200))
-        self.screen.blit(level_text, (COLS * BLOCK_SIZE + 10, 230))
-        self.screen.blit(lines_text, (COLS * BLOCK_SIZE + 10, 260))
-        self.screen.blit(music_volume_text, (COLS * BLOCK_SIZE + 10, 290))
-        self.screen.blit(m_v_text, (COLS * BLOCK_SIZE + 10, 305))
-        self.screen.blit(move_volume_text, (COLS * BLOCK_SIZE + 10, 320))
-        self.screen.blit(move_v_text, (COLS * BLOCK_SIZE + 10, 335))
-        self.screen.blit(clear_volume_text, (COLS * BLOCK_SIZE + 10, 350))
-        self.screen.blit(c_v_text, (COLS * BLOCK_SIZE + 10, 365))
-        self.screen.blit(over_volume_text, (COLS * BLOCK_SIZE + 10, 380))
-        self.screen.blit(o_v_text, (COLS * BLOCK_SIZE + 10, 395))
-        self.screen.blit(pause_text, (COLS * BLOCK_SIZE + 10, 420))
+        score_text = self.text.render(f"Очки: {self.score}", (255, 255, 255))
+        level_text = self.text.render(f"Уровень: {self.level}", (255, 255, 255))
+        lines_text = self.text.render(f"Линии: {self.lines_cleared}", (255, 255, 255))
+        volumes = self.audio.volumes
+        music_volume_text = self.text.render(f"Громкость музыки: {round(volumes['music'] * 100)}%", (255, 255, 255))
+        m_v_text = self.text.render(f"повысить: + понизить: -", (255, 255, 255))
+        move_volume_text = self.text.render(f"Громкость кнопок: {round(volumes['move'] * 100)}%", (255, 255, 255))
+        move_v_text = self.text.render(f"повысить: e понизить: w", (255, 255, 255))
+        clear_volume_text = self.text.render(f"Громкость стирания линий: {round(volumes['clear'] * 100)}%", (255, 255, 255))
+        c_v_text = self.text.render(f"повысить: f понизить: d", (255, 255, 255))
+        over_volume_text = self.text.render(f"Громкость завершения: {round(volumes['over'] * 100)}%", (255, 255, 255))
+        o_v_text = self.text.render(f"повысить: v понизить: c", (255, 255, 255))
+        record_text = self.text.render(f"Рекорд: {self.best_score}", MALINA_COLOR)
+        pause_text = self.text.render(f"Пауза - P", (255, 255, 255))
+        self.screen.blit(record_text, (self.panel_rect.x + 10, 170))
+        self.screen.blit(score_text, (self.panel_rect.x + 10, 200))
+        self.screen.blit(level_text, (self.panel_rect.x + 10, 230))
+        self.screen.blit(lines_text, (self.panel_rect.x + 10, 260))
+        self.screen.blit(music_volume_text, (self.panel_rect.x + 10, 290))
+        self.screen.blit(m_v_text, (self.panel_rect.x + 10, 305))
+        self.screen.blit(move_volume_text, (self.panel_rect.x + 10, 320))
+        self.screen.blit(move_v_text, (self.panel_rect.x + 10, 335))
+        self.screen.blit(clear_volume_text, (self.panel_rect.x + 10, 350))
+        self.screen.blit(c_v_text, (self.panel_rect.x + 10, 365))
+        self.screen.blit(over_volume_text, (self.panel_rect.x + 10, 380))
+        self.screen.blit(o_v_text, (self.panel_rect.x + 10, 395))
+        self.screen.blit(pause_text, (self.panel_rect.x + 10, 420))
 
 
     def pause_menu(self):
         paused = True
-        font = pygame.font.SysFont("Arial", 24)
-        options = ["Продолжить (P)", "Перезапустить (R)", "Выход (Q)"]
+        options = ["Продолжить (P)", "Перезапустить (R)", "Сохранить (S)", "Загрузить (L)", "Выход (Q)"]
         selected = 0
+        slot_text = None  # Подпись слота читается из файла только при смене слота
 
         while paused:
+            if slot_text is None:
+                slot_text = f"Слот {self.slot} из {savestate.SLOTS} (1-{savestate.SLOTS}): " \
+                            f"{savestate.describe(self.slot)}"
             self.screen.fill(BACKGROUND_COLOR)
-            y = SCREEN_HEIGHT // 2 - 60
+            y = SCREEN_HEIGHT // 2 - 100
             for i, opt in enumerate(options):
                 color = MALINA_COLOR if i == selected else (255, 255, 255)
-                text = font.render(opt, True, color)
+                text = self.text.render(opt, color, 24)
                 self.screen.blit(text, (50, y))
                 y += 40
+            self.screen.blit(self.text.render(slot_text, (255, 255, 255)), (50, y + 10))
 
             pygame.display.flip()
 
@@ -417,103 +387,144 @@ class TetrisGame:
                     elif event.key == pygame.K_p:
                         paused = False
                     elif event.key == pygame.K_r:
-                        self.__init__()  # Пересоздаём игру
+                        self.restart()  # Окно и звук не пересоздаются
                         paused = False
+                    elif event.key == pygame.K_s:
+                        self.save_slot()
+                        slot_text = None
+                    elif event.key == pygame.K_l and not self.feeder:
+                        paused = not self.load_slot()
+                    elif pygame.K_1 <= event.key < pygame.K_1 + savestate.SLOTS:
+                        self.slot = event.key - pygame.K_1 + 1
+                        slot_text = None
                     elif event.key == pygame.K_q:
+                        self.export_profile()
+                        self.stop_recording()  # Без итоговых очков повтор нельзя проверить
+                        self.leaderboard.close()
                         pygame.quit()
                         exit()
-
-    def change_music_volume(self, delta): # Изменение громкости фоновой музыки
-        self.music_volume = max(0.0, min(1.0, self.music_volume + delta))
-        pygame.mixer.music.set_volume(self.music_volume)
-        print(f"Громкость музыки: {self.music_volume:.2f}")
-
-    def change_move_volume(self, delta): # Изменение громкости нажатия кнопок
-        self.move_volume = max(0.0, min(1.0, self.move_volume + delta))
-        move_sound.set_volume(self.move_volume)
-
-    def change_clear_volume(self, delta):  # Изменение громкости исчезающих линий
-        self.clear_volume = max(0.0, min(1.0, self.clear_volume + delta))
-        clear_sound.set_volume(self.clear_volume)
-
-    def change_over_volume(self, delta):  # Изменение громкости исчезающих линий
-        self.over_volume = max(0.0, min(1.0, self.over_volume + delta))
-        game_over_sound.set_volume(self.over_volume)
+        self.invalidate_screen()
+        self.timestep.reset()  # Время паузы не догоняем
 
     def run(self):
         """Основной игровой цикл."""
         while not self.game_over:
-            self.screen.fill(BACKGROUND_COLOR)
-            self.fall_time += self.clock.get_rawtime()
-            self.clock.tick(FPS)
-
-            for event in pygame.event.get():
+            profiler = self.profiler  # F3 может включить замеры со следующего кадра
+            profiler.begin_frame()
+            events = pygame.event.get()
+            profiler.mark(EVENTS)
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.game_over = True
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
-                        self.change_music_volume(0.1)   # + — повысить громкость музыки
-                    elif event.key == pygame.K_MINUS:
-                        self.change_music_volume(-0.1)  # - — понизить громкость музыки
-                    if event.key == pygame.K_e:
-                        self.change_move_volume(0.1)   # e — повысить громкость кнопок
-                    elif event.key == pygame.K_w:
-                        self.change_move_volume(-0.1)  # w — понизить громкость кнопок
-                    elif event.key == pygame.K_f:
-                        self.change_clear_volume(0.1)  # f — повысить громкость исчезания строк
-                    elif event.key == pygame.K_d:
-                        self.change_clear_volume(-0.1) # d — понизить громкость исчезания строк
-                    elif event.key == pygame.K_v:
-                        self.change_clear_volume(0.1)  # v — повысить громкость конца
-                    elif event.key == pygame.K_c:
-                        self.change_clear_volume(-0.1) # c — понизить громкость конца
+                    if event.key in VOLUME_KEYS:
+                        self.audio.change_volume(*VOLUME_KEYS[event.key])  # +/-, e/w, f/d, v/c
                     if event.key == pygame.K_p:
                         self.pause_menu()
-                    if event.key == pygame.K_LEFT and not self.check_collision(dx=-1):
-                        self.x -= 1
-                        try:
-                            move_sound.play()
-                        except:
-                            pass
-                    if event.key == pygame.K_RIGHT and not self.check_collision(dx=1):
-                        self.x += 1
-                        try:
-                            move_sound.play()
-                        except:
-                            pass
-                    if event.key == pygame.K_DOWN and not self.check_collision(dy=1):
-                        self.y += 1
-                    if event.key == pygame.K_UP:
-                        self.rotate_piece()
-                    if event.key == pygame.K_SPACE:
-                        self.hard_drop()
-
-            if self.fall_time > self.fall_speed:
-                if not self.check_collision(dy=1):
-                    self.y += 1
-                else:
-                    self.lock_piece()
-                    # pygame.time.delay(100)  # Добавляем паузу для обновления экрана
-                self.fall_time = 0
-
-            self.draw_grid()
-            self.draw_piece()
-            self.draw_next_piece()
-            self.draw_score()
-            # self.draw_volume()
-            pygame.display.flip()
-        pygame.mixer.music.stop()  # Стоп музыка
+                    if event.key == pygame.K_t:
+                        self.turbo = not self.turbo  # t — турбо-режим без отрисовки
+                        self.invalidate_screen()
+                        self.timestep.reset()
+                    if event.key == pygame.K_LEFTBRACKET:
+                        self.zoom(1)   # [ — уменьшить масштаб поля
+                    elif event.key == pygame.K_RIGHTBRACKET:
+                        self.zoom(-1)  # ] — увеличить масштаб поля
+                    if event.key == pygame.K_F3:
+                        self.overlay = not self.overlay  # F3 — оверлей замеров кадра
+                        if not self.profiler.enabled:
+                            self.profiler = FrameProfiler()
+                        self.invalidate_screen()
+                    if event.key in KEY_ACTIONS and not self.feeder:
+                        self.handle_action(KEY_ACTIONS[event.key])  # Во время вспышки встанет в очередь
+                if event.type == pygame.KEYUP and event.key == pygame.K_DOWN and not self.feeder:
+                    self.handle_action(ACTION_SOFT_DROP_END)
+            profiler.mark(INPUT)
+
+            # Гравитация, повтор сброса и задержки идут целыми тактами
+            ticks = TURBO_TICKS if self.turbo else self.timestep.advance()
+            for _ in range(ticks):
+                if self.feeder:
+                    self.feeder.feed(self)  # Действия из повтора в записанные такты
+                    if self.feeder.finished:
+                        self.game_over = True
+                        break
+                self.tick()
+                if self.game_over:
+                    break
+            profiler.mark(UPDATE)
+            if self.turbo:
+                profiler.end_frame()
+                continue
+
+            self.renderer.follow(self.x, self.y, self.piece.width, self.piece.height)
+            dirty = self.renderer.render(self.board, self.current_piece, self.x, self.y, self.ghost_y)
+            profiler.mark(DRAW_BOARD)
+            if self.clearing_rows:
+                dirty += self.draw_flash()
+            profiler.mark(DRAW_FLASH)
+            panel = self.draw_panel()
+            dirty += panel
+            profiler.mark(DRAW_PANEL)
+            if self.overlay:
+                dirty += self.draw_overlay(force=bool(panel))  # Панель затёрла оверлей
+            profiler.mark(OVERLAY)
+            pygame.display.update(dirty)
+            profiler.mark(DISPLAY)
+            if STARTUP.finish() and (STARTUP.over_budget or profiler.enabled):
+                print(STARTUP.report())
+            self.clock.tick(self.fps)
+            profiler.mark(WAIT)
+            profiler.end_frame()
+        self.export_profile()
+        self.stop_recording()
+        if self.feeder:
+            print(f"Повтор окончен: очки {self.score}, в записи {self.feeder.expected_score}")
+            pygame.quit()
+            return
+        self.audio.stop_music()  # Стоп музыка
         pygame.time.delay(500)  # Пауза между музыкой и звуком окончания
-        try:
-            game_over_sound.play()
-            pygame.time.delay(300)  # Ждём окончания звука
-        except:
-            pass
+        self.audio.play("over")
+        pygame.time.delay(300)  # Ждём окончания звука
         self.input_name_screen()  # Запрашиваем имя при завершении
+        self.leaderboard.close()
         pygame.quit()
 
 
+def positive_float(text): # Тип аргумента: число больше нуля
+    value = float(text)
+    if not 0 < value < math.inf:  # nan и inf тоже не скорость
+        raise argparse.ArgumentTypeError(f"нужно число больше нуля, а не {text}")
+    return value
+
+
+def non_negative_int(text): # Тип аргумента: целое не меньше нуля (сид и задержка пишутся в повтор)
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"нужно целое не меньше нуля, а не {text}")
+    return value
+
+
 # Запуск игры
 if __name__ == "__main__":
-    game = TetrisGame()
+    parser = argparse.ArgumentParser(description="Малиновый Тетрис")
+    parser.add_argument("--fps", type=int, default=FPS, help="ограничение кадров в секунду, 0 - без ограничения")
+    parser.add_argument("--vsync", action="store_true", help="синхронизация с частотой экрана")
+    parser.add_argument("--turbo", action="store_true", help="симуляция без отрисовки (переключается клавишей T)")
+    parser.add_argument("--lock-delay", type=non_negative_int, default=None, help="задержка фиксации фигуры, мс")
+    parser.add_argument("--seed", type=non_negative_int, default=None, help="сид партии")
+    parser.add_argument("--record", metavar="DIR", help="записывать повторы партий в папку")
+    parser.add_argument("--replay", metavar="FILE", help="показать повтор партии")
+    parser.add_argument("--speed", type=positive_float, default=1.0, help="скорость показа повтора")
+    parser.add_argument("--audio-buffer", type=int, default=512,
+                        help="буфер микшера в сэмплах: меньше - меньше задержка звука")
+    parser.add_argument("--rows", type=int, default=ROWS, help="высота поля в клетках")
+    parser.add_argument("--cols", type=int, default=COLS, help="ширина поля в клетках")
+    parser.add_argument("--profile", action="store_true", help="замерять фазы кадра (оверлей - F3)")
+    parser.add_argument("--profile-out", metavar="PREFIX",
+                        help="при выходе выгрузить замеры в PREFIX.csv и PREFIX.json (Chrome trace)")
+    args = parser.parse_args()
+    game = TetrisGame(fps=args.fps, vsync=args.vsync, turbo=args.turbo, lock_delay=args.lock_delay,
+                      seed=args.seed, record_dir=args.record, replay=args.replay, speed=args.speed,
+                      profile=args.profile, profile_out=args.profile_out, audio_buffer=args.audio_buffer,
+                      rows=args.rows, cols=args.cols)
     game.run()
\ No newline at end of file
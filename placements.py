@@ -0,0 +1,111 @@
+"""Все достижимые конечные положения фигуры, включая подсовывание и сдвиги.
+
+Поиск в ширину по состояниям (поворот, x, y) теми же ходами, что есть у игрока:
+влево, вправо, вниз и поворот. Конечное положение - то, из которого нельзя
+опуститься ниже. Результаты запоминаются в ограниченном LRU-кэше по ключу
+(поле, фигура, начальное положение): одинаковые профили поля встречаются часто.
+Работает с BitBoard.
+"""
+from collections import OrderedDict, deque, namedtuple
+
+from shapes import shape_registry
+
+Placement = namedtuple("Placement", "rotation x y")
+
+
+class PlacementCache:
+    """LRU-кэш найденных положений."""
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        placements = self.items.get(key)
+        if placements is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.items.move_to_end(key)
+        return placements
+
+    def put(self, key, placements):
+        self.items[key] = placements
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+
+CACHE = PlacementCache()
+
+
+def locked_bits(bits, rotation, x, y, full_mask):
+    """
+    Маски строк после фиксации фигуры и удаления заполненных строк.
+    :return: (новые маски строк, число очищенных линий)
+    """
+    bits = bits[:]
+    for row, mask in enumerate(rotation.masks, y):
+        bits[row] |= mask << x
+    kept = [value for value in bits if value != full_mask]
+    lines = len(bits) - len(kept)
+    if lines:
+        bits = [0] * lines + kept
+    return bits, lines
+
+
+def search(board, rotation, x, y):
+    """Поиск в ширину от положения (rotation, x, y); выдаёт Placement по мере нахождения."""
+    collides = board.collides
+    if collides(rotation, x, y):
+        return
+    seen = {(rotation.index, x, y)}
+    resting = set()  # Одинаковые клетки у симметричных поворотов - одно положение
+    queue = deque([(rotation, x, y)])
+    while queue:
+        rotation, x, y = queue.popleft()
+        if collides(rotation, x, y + 1):
+            key = (rotation.matrix, x, y)
+            if key not in resting:
+                resting.add(key)
+                yield Placement(rotation, x, y)
+        for state in ((rotation, x - 1, y), (rotation, x + 1, y),
+                      (rotation, x, y + 1), (rotation.next, x, y)):
+            key = (state[0].index, state[1], state[2])
+            if key not in seen:
+                seen.add(key)
+                if not collides(*state):
+                    queue.append(state)
+
+
+def reachable_placements(board, shape_id, start=None, cache=CACHE):
+    """
+    Генератор достижимых конечных положений фигуры с полями после хода.
+    Можно прервать в любой момент; в кэш попадает только полный перебор.
+    :param board: BitBoard
+    :param shape_id: номер фигуры в реестре
+    :param start: (поворот, x, y) начала поиска, по умолчанию место появления
+    :param cache: PlacementCache или None
+    :return: генератор (Placement, маски строк после хода, число линий)
+    """
+    if start is None:
+        rotation = shape_registry(board.cols)[shape_id].rotations[0]
+        start = (rotation, rotation.spawn_x, 0)
+    key = (tuple(board.bits), shape_id, start[0].index, start[1], start[2])
+    placements = cache.get(key) if cache is not None else None
+    full = board.full_mask
+    if placements is not None:
+        for placement in placements:
+            yield (placement,) + locked_bits(board.bits, *placement, full)
+        return
+    found = []
+    for placement in search(board, *start):
+        found.append(placement)
+        yield (placement,) + locked_bits(board.bits, *placement, full)
+    if cache is not None:
+        cache.put(key, tuple(found))
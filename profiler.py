@@ -0,0 +1,134 @@
+"""Замеры фаз игрового цикла по кадрам.
+
+Цикл размечает фазы по порядку вызовами mark(фаза): время с прошлой отметки
+добавляется к фазе текущего кадра. Длительности лежат в кольцевом буфере
+заранее выделенного размера, поэтому память не растёт, а старые кадры
+вытесняются новыми. Буфер выгружается в CSV и в JSON формата Chrome trace
+(открывается в chrome://tracing и Perfetto).
+
+Когда замеры не нужны, вместо FrameProfiler используется NullProfiler
+с пустыми методами - накладные расходы сводятся к вызову пустой функции.
+"""
+import json
+import time
+from array import array
+
+# Фазы кадра в порядке выполнения в TetrisGame.run()
+EVENTS, INPUT, UPDATE, DRAW_BOARD, DRAW_FLASH, DRAW_PANEL, OVERLAY, DISPLAY, WAIT = range(9)
+PHASES = ("events", "input", "update", "draw_board", "draw_flash", "draw_panel",
+          "overlay", "display", "wait")
+IDLE = (WAIT,)  # Ожидание кадра не считается работой при поиске самой медленной фазы
+CAPACITY = 1024  # Кадров в буфере
+
+
+class NullProfiler:
+    """Замеры выключены: все методы ничего не делают."""
+    enabled = False
+    frames = 0
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+class FrameProfiler:
+    enabled = True
+
+    def __init__(self, capacity=CAPACITY, clock=time.perf_counter_ns):
+        """
+        :param capacity: сколько последних кадров хранить
+        :param clock: часы в наносекундах
+        """
+        self.capacity = capacity
+        self.clock = clock
+        self.phases = len(PHASES)
+        self.starts = array("q", bytes(8 * capacity))           # Начало кадра, нс
+        self.totals = array("q", bytes(8 * capacity))           # Длительность кадра, нс
+        self.durations = array("q", bytes(8 * capacity * self.phases))  # Кадр x фаза, нс
+        self.frames = 0  # Всего начатых кадров
+        self.base = 0
+        self.last = 0
+
+    def begin_frame(self):
+        slot = self.frames % self.capacity
+        self.base = slot * self.phases
+        for i in range(self.base, self.base + self.phases):
+            self.durations[i] = 0
+        self.last = self.starts[slot] = self.clock()
+
+    def mark(self, phase): # Время с прошлой отметки - фазе phase
+        now = self.clock()
+        self.durations[self.base + phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        slot = self.frames % self.capacity
+        self.totals[slot] = self.clock() - self.starts[slot]
+        self.frames += 1
+
+    def slots(self, count=None):
+        """Ячейки буфера последних count законченных кадров, от старых к новым."""
+        stored = min(self.frames, self.capacity)
+        count = stored if count is None else min(count, stored)
+        return [(self.frames - count + i) % self.capacity for i in range(count)]
+
+    def stats(self, count=None):
+        """
+        Сводка по последним кадрам.
+        :return: словарь fps, p50/p95/p99 времени кадра в мс и самая медленная фаза
+        """
+        slots = self.slots(count)
+        if not slots:
+            return None
+        totals = sorted(self.totals[slot] for slot in slots)
+        last = len(totals) - 1
+        span = self.starts[slots[-1]] + self.totals[slots[-1]] - self.starts[slots[0]]
+        means = []
+        for phase in range(self.phases):
+            if phase not in IDLE:
+                total = sum(self.durations[slot * self.phases + phase] for slot in slots)
+                means.append((total / len(slots), phase))
+        slowest, phase = max(means)
+        return {
+            "fps": len(slots) * 1e9 / span if span else 0.0,
+            "p50": totals[round(last * 0.50)] / 1e6,
+            "p95": totals[round(last * 0.95)] / 1e6,
+            "p99": totals[round(last * 0.99)] / 1e6,
+            "slowest": PHASES[phase],
+            "slowest_ms": slowest / 1e6,
+        }
+
+    def export_csv(self, path):
+        """Кадр на строку: номер, начало и длительность кадра и фаз в микросекундах."""
+        with open(path, "w") as f:
+            f.write(",".join(("frame", "start_us", "total_us") + PHASES) + "\n")
+            first = self.frames - len(self.slots())
+            for number, slot in enumerate(self.slots(), first):
+                base = slot * self.phases
+                values = [number, self.starts[slot] // 1000, self.totals[slot] // 1000]
+                values += [value // 1000 for value in self.durations[base:base + self.phases]]
+                f.write(",".join(map(str, values)) + "\n")
+
+    def export_trace(self, path):
+        """События Chrome trace: кадр и вложенные в него фазы (фазы идут подряд)."""
+        events = []
+        first = self.frames - len(self.slots())
+        for number, slot in enumerate(self.slots(), first):
+            start = self.starts[slot]
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": start / 1000, "dur": self.totals[slot] / 1000,
+                           "args": {"frame": number}})
+            base = slot * self.phases
+            for phase in range(self.phases):
+                duration = self.durations[base + phase]
+                if duration:
+                    events.append({"name": PHASES[phase], "ph": "X", "pid": 1, "tid": 1,
+                                   "ts": start / 1000, "dur": duration / 1000})
+                    start += duration
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
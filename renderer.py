@@ -0,0 +1,229 @@
+"""Отрисовка игрового поля по изменившимся областям (dirty rectangles).
+
+На экране видна только часть поля - окно просмотра (viewport) из view_rows x
+view_cols клеток, начиная со строки top и столбца left; размер клетки задаёт
+масштаб. Зафиксированные блоки окна живут во внеэкранной поверхности: при
+фиксации фигуры и удалении линий перерисовываются только изменившиеся куски
+строк, попавшие в окно, а при прокрутке поверхность сдвигается и дорисовываются
+открывшиеся полосы. Падающая фигура накладывается поверх, а на экран уходят
+лишь затронутые прямоугольники. Стоимость кадра зависит от размера окна
+и изменений, а не от размера поля. Тень фигуры (место, куда она упадёт)
+рисуется тем же способом, что и сама фигура.
+"""
+import pygame
+
+from board import CHUNK_ROWS
+
+FOLLOW_MARGIN = 3  # Сколько клеток оставлять между фигурой и краем окна
+
+
+def make_tile(color, border_color, block_size): # Заранее нарисованная клетка с рамкой
+    tile = pygame.Surface((block_size, block_size))
+    tile.fill(color)
+    pygame.draw.rect(tile, border_color, (0, 0, block_size, block_size), 1)
+    return tile.convert()
+
+
+class BoardRenderer:
+    def __init__(self, screen, rows, cols, block_size, block_color, empty_color, border_color,
+                 view_size=None, ghost_color=None):
+        """
+        :param view_size: (ширина, высота) области поля на экране в пикселях,
+            по умолчанию всё поле целиком
+        :param ghost_color: цвет тени фигуры
+        """
+        self.screen = screen
+        self.rows = rows
+        self.cols = cols
+        self.block_color = block_color
+        self.empty_color = empty_color
+        self.border_color = border_color
+        self.ghost_color = ghost_color
+        self.view_rect = pygame.Rect((0, 0), view_size or (cols * block_size, rows * block_size))
+        self.top = 0  # Первая видимая строка
+        self.left = 0  # Первый видимый столбец
+        self.board = None  # Поле, с которым синхронизирована поверхность
+        self.piece_rect = None  # Где фигура нарисована на экране сейчас
+        self.piece_key = None
+        self.set_block_size(block_size)
+
+    def set_block_size(self, block_size):
+        """Масштаб: размер клетки в пикселях. Окно просмотра рисуется заново."""
+        self.block_size = block_size
+        self.tiles = {}
+        self.block_tile = self.tile(self.block_color)
+        self.empty_tile = self.tile(self.empty_color)
+        self.view_cols = min(self.cols, self.view_rect.width // block_size)
+        self.view_rows = min(self.rows, self.view_rect.height // block_size)
+        self.surface = pygame.Surface((self.view_cols * block_size, self.view_rows * block_size)).convert()
+        # Пустая строка окна целиком: строка рисуется ею и блоками поверх
+        self.empty_row = pygame.Surface((self.view_cols * block_size, block_size)).convert()
+        self.empty_row.blits([(self.empty_tile, (col * block_size, 0))
+                              for col in range(self.view_cols)], False)
+        self.top, self.left = self.clamp(self.top, self.left)
+        self.repaint = True  # Поверхность окна нужно нарисовать заново
+        self.full_redraw = True
+
+    def tile(self, color): # Клетка цвета color в текущем масштабе
+        tile = self.tiles.get(color)
+        if tile is None:
+            tile = self.tiles[color] = make_tile(color, self.border_color, self.block_size)
+        return tile
+
+    def invalidate(self): # Экран затёрт (меню, анимация) - следующий кадр целиком
+        self.full_redraw = True
+
+    def clamp(self, top, left):
+        return (max(0, min(top, self.rows - self.view_rows)),
+                max(0, min(left, self.cols - self.view_cols)))
+
+    def scroll_to(self, top, left):
+        """Сдвигает окно просмотра; поверхность сдвигается, дорисовываются новые полосы."""
+        top, left = self.clamp(top, left)
+        dy, dx = top - self.top, left - self.left
+        if not dy and not dx:
+            return
+        self.top, self.left = top, left
+        self.full_redraw = True
+        if self.repaint or self.board is None or abs(dy) >= self.view_rows or abs(dx) >= self.view_cols:
+            self.repaint = True
+            return
+        size = self.block_size
+        self.surface.scroll(-dx * size, -dy * size)
+        bottom, right = top + self.view_rows, left + self.view_cols
+        if dy > 0:
+            self.draw_region(self.board, bottom - dy, bottom, left, right)
+        elif dy < 0:
+            self.draw_region(self.board, top, top - dy, left, right)
+        if dx > 0:
+            self.draw_region(self.board, top, bottom, right - dx, right)
+        elif dx < 0:
+            self.draw_region(self.board, top, bottom, left, left - dx)
+
+    def follow(self, x, y, width, height):
+        """Прокручивает окно так, чтобы область фигуры была видна с запасом FOLLOW_MARGIN."""
+        top, left = self.top, self.left
+        margin = min(FOLLOW_MARGIN, max(0, (self.view_rows - height) // 2))
+        if y - margin < top:
+            top = y - margin
+        elif y + height + margin > top + self.view_rows:
+            top = y + height + margin - self.view_rows
+        margin = min(FOLLOW_MARGIN, max(0, (self.view_cols - width) // 2))
+        if x - margin < left:
+            left = x - margin
+        elif x + width + margin > left + self.view_cols:
+            left = x + width + margin - self.view_cols
+        self.scroll_to(top, left)
+
+    def draw_region(self, board, row_start, row_stop, col_start, col_stop):
+        """Рисует во внеэкранной поверхности клетки поля в пределах окна."""
+        row_start, row_stop = max(row_start, self.top), min(row_stop, self.top + self.view_rows)
+        col_start, col_stop = max(col_start, self.left), min(col_stop, self.left + self.view_cols)
+        if row_start >= row_stop or col_start >= col_stop:
+            return
+        size = self.block_size
+        x0 = (col_start - self.left) * size
+        strip = pygame.Rect(x0, 0, (col_stop - col_start) * size, size)
+        mask = (1 << (col_stop - col_start)) - 1
+        block = self.block_tile
+        blits = []
+        for row in range(row_start, row_stop):
+            y = (row - self.top) * size
+            blits.append((self.empty_row, (x0, y), strip))
+            value = (board.row_bits(row) >> col_start) & mask
+            while value:
+                low = value & -value
+                blits.append((block, (x0 + (low.bit_length() - 1) * size, y)))
+                value ^= low
+        self.surface.blits(blits, False)
+
+    def sync(self, board):
+        """
+        Перерисовывает во внеэкранной поверхности изменившиеся видимые куски поля.
+        :return: прямоугольник изменившейся полосы строк или None
+        """
+        if board is not self.board:
+            self.board = board
+            self.repaint = True
+        top, bottom = self.top, self.top + self.view_rows
+        left, right = self.left, self.left + self.view_cols
+        if self.repaint:
+            self.repaint = False
+            board.changed.clear()
+            self.draw_region(board, top, bottom, left, right)
+            return self.surface.get_rect()
+        if not board.changed:
+            return None
+        first, last = top // CHUNK_ROWS, (bottom - 1) // CHUNK_ROWS
+        chunks = [chunk for chunk in board.changed if first <= chunk <= last]
+        board.changed.clear()  # Невидимые куски нарисуются, когда окно до них дойдёт
+        if not chunks:
+            return None
+        for chunk in chunks:
+            self.draw_region(board, chunk * CHUNK_ROWS, (chunk + 1) * CHUNK_ROWS, left, right)
+        start = max(min(chunks) * CHUNK_ROWS, top) - top
+        stop = min((max(chunks) + 1) * CHUNK_ROWS, bottom) - top
+        size = self.block_size
+        return pygame.Rect(0, start * size, self.view_cols * size, (stop - start) * size)
+
+    def draw_board(self): # Окно поля целиком на экран
+        if self.surface.get_size() != self.view_rect.size:
+            self.screen.fill(self.empty_color, self.view_rect)  # Поля от неполных клеток
+        self.screen.blit(self.surface, self.view_rect.topleft)
+
+    def draw_piece(self, matrix, x, y, tile=None):
+        """Накладывает видимые клетки фигуры на экран, возвращает занятый ею прямоугольник."""
+        size = self.block_size
+        block = tile or self.block_tile
+        x -= self.left
+        y -= self.top
+        cols, rows = self.view_cols, self.view_rows
+        self.screen.blits([(block, ((x + col) * size, (y + row) * size))
+                           for row, line in enumerate(matrix) if 0 <= y + row < rows
+                           for col, cell in enumerate(line) if cell and 0 <= x + col < cols], False)
+        return pygame.Rect(x * size, y * size, len(matrix[0]) * size, len(matrix) * size)
+
+    def draw_rows(self, rows, color):
+        """Закрашивает видимые части строк rows клетками цвета color; возвращает их прямоугольники."""
+        tile = self.tile(color)
+        size = self.block_size
+        rects = []
+        for row in rows:
+            if self.top <= row < self.top + self.view_rows:
+                y = (row - self.top) * size
+                self.screen.blits([(tile, (col * size, y)) for col in range(self.view_cols)], False)
+                rects.append(pygame.Rect(0, y, self.view_cols * size, size))
+        return rects
+
+    def render(self, board, matrix, x, y, ghost_y=None):
+        """
+        Кадр поля с падающей фигурой.
+        :param ghost_y: строка тени фигуры (None - без тени)
+        :return: список прямоугольников экрана, которые нужно обновить
+        """
+        band = self.sync(board)
+        dirty = []
+        if self.full_redraw:
+            self.draw_board()
+            dirty.append(self.view_rect)
+            self.full_redraw = False
+        elif band:
+            self.screen.blit(self.surface, band, band)
+            dirty.append(band)
+        elif self.piece_key == (matrix, x, y, ghost_y):
+            return dirty  # Ничего не изменилось
+        if self.piece_rect:
+            # Стираем фигуру со старого места, восстанавливая поле под ней
+            old = self.piece_rect.clip(self.surface.get_rect())
+            self.screen.blit(self.surface, old, old)
+            dirty.append(old)
+        piece_rect = None
+        if ghost_y is not None and ghost_y != y and self.ghost_color:
+            # Тень под фигурой (фигура рисуется поверх): одно обновление на обе
+            piece_rect = self.draw_piece(matrix, x, ghost_y, self.tile(self.ghost_color))
+        rect = self.draw_piece(matrix, x, y)
+        piece_rect = piece_rect.union(rect) if piece_rect else rect
+        self.piece_rect = piece_rect.clip(self.surface.get_rect())
+        self.piece_key = (matrix, x, y, ghost_y)
+        dirty.append(self.piece_rect)
+        return dirty
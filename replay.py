@@ -0,0 +1,212 @@
+"""Запись и воспроизведение партий.
+
+Формат файла: заголовок (MAGIC, версия, затем varint-числа с сидом и
+параметрами движка) и поток записей. Запись - одно varint-число
+(разница тактов с прошлой записью << 4 | действие). Запись END завершает
+партию и содержит итоговые такты и очки, по которым проверяется рекорд.
+
+Проверить повторы без окна на максимальной скорости:
+    python replay.py replays/*.ztr
+Повтор без записи END (партия прервана) отмечается как непроверенный.
+Посмотреть повтор в окне: python main.py --replay FILE --speed 4
+"""
+import argparse
+import io
+import sys
+from collections import namedtuple
+
+from engine import TetrisEngine
+
+MAGIC = b"ZTRP"
+VERSION = 1
+END = 15  # Код действия-маркера конца партии
+
+Header = namedtuple("Header", "seed rows cols clear_delay lock_delay lines_per_level "
+                              "fall_speed_base fall_speed_step fall_speed_min")
+
+
+def write_varint(stream, value):
+    if value < 0:  # Сдвиг отрицательного числа никогда не даёт 0
+        raise ValueError(f"varint не бывает отрицательным: {value}")
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            stream.write(bytes((byte | 0x80,)))
+        else:
+            stream.write(bytes((byte,)))
+            return
+
+
+def read_varint(stream):
+    """Очередное число или None в конце файла."""
+    result = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise ValueError("Повтор обрывается посреди числа")
+            return None
+        result |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+def engine_header(engine): # Заголовок повтора для партии движка
+    return Header(engine.seed, engine.board.rows, engine.board.cols, engine.clear_delay,
+                  engine.lock_delay, engine.lines_per_level, engine.fall_speed_base,
+                  engine.fall_speed_step, engine.fall_speed_min)
+
+
+class ReplayWriter:
+    """Пишет действия по мере игры; подключается как engine.recorder."""
+
+    def __init__(self, path, engine):
+        if engine.seed is None:
+            raise ValueError("Для записи повтора у партии должен быть сид")
+        data = io.BytesIO()  # Заголовок собирается до открытия файла: при ошибке файла не будет
+        data.write(MAGIC + bytes((VERSION,)))
+        header = engine_header(engine)
+        # lock_delay может быть None - пишем со сдвигом на единицу, 0 значит None
+        lock_delay = 0 if header.lock_delay is None else header.lock_delay + 1
+        for value in header._replace(lock_delay=lock_delay):
+            write_varint(data, value)
+        self.file = open(path, "wb")
+        self.file.write(data.getvalue())
+        self.file.flush()
+        self.last_tick = 0
+
+    def record(self, tick, action):
+        write_varint(self.file, (tick - self.last_tick) << 4 | action)
+        self.last_tick = tick
+        self.file.flush()  # Повтор не теряется, даже если игра упадёт
+
+    def close(self, engine):
+        """Маркер конца с итоговыми тактами и очками."""
+        if self.file.closed:
+            return
+        self.record(engine.ticks, END)
+        write_varint(self.file, engine.score)
+        self.file.close()
+
+
+def read_header(stream):
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Это не файл повтора")
+    version = stream.read(1)
+    if not version or version[0] != VERSION:
+        raise ValueError(f"Неизвестная версия повтора: {version}")
+    values = [read_varint(stream) for _ in Header._fields]
+    if None in values:
+        raise ValueError("Повтор обрывается в заголовке")
+    header = Header(*values)
+    return header._replace(lock_delay=None if header.lock_delay == 0 else header.lock_delay - 1)
+
+
+def read_records(stream):
+    """
+    Записи повтора.
+    :return: генератор (такт, действие, очки); очки есть только у записи END
+    """
+    tick = 0
+    while True:
+        value = read_varint(stream)
+        if value is None:
+            return
+        tick += value >> 4
+        action = value & 0x0F
+        if action == END:
+            yield tick, END, read_varint(stream)
+            return
+        yield tick, action, None
+
+
+def load(path):
+    """Заголовок и все записи файла повтора."""
+    with open(path, "rb") as f:
+        stream = io.BytesIO(f.read())
+    header = read_header(stream)
+    return header, list(read_records(stream))
+
+
+def make_engine(header, engine_class=TetrisEngine, **kwargs):
+    """Движок с теми же сидом и параметрами, что в записанной партии."""
+    return engine_class(seed=header.seed, clear_delay=header.clear_delay,
+                        lock_delay=header.lock_delay, lines_per_level=header.lines_per_level,
+                        fall_speed_base=header.fall_speed_base,
+                        fall_speed_step=header.fall_speed_step,
+                        fall_speed_min=header.fall_speed_min, rows=header.rows,
+                        cols=header.cols, **kwargs)
+
+
+class ReplayFeeder:
+    """Подаёт записанные действия в движок в те же такты, что и при игре."""
+
+    def __init__(self, records):
+        self.records = records
+        self.position = 0
+        self.end_tick = None
+        self.expected_score = None
+        for tick, action, score in records:
+            if action == END:
+                self.end_tick, self.expected_score = tick, score
+
+    @property
+    def finished(self):
+        return self.position >= len(self.records)
+
+    def feed(self, engine):
+        """Применяет все действия, записанные на текущий такт движка."""
+        records = self.records
+        while self.position < len(records) and records[self.position][0] <= engine.ticks:
+            tick, action, _ = records[self.position]
+            self.position += 1
+            if action != END:
+                engine.apply(action)
+
+
+def play_headless(path):
+    """
+    Пересчитывает партию без окна на максимальной скорости.
+    :return: (движок после партии, ожидаемые очки или None)
+    """
+    header, records = load(path)
+    engine = make_engine(header)
+    feeder = ReplayFeeder(records)
+    while not engine.game_over:
+        feeder.feed(engine)
+        if feeder.finished or engine.game_over:
+            break
+        engine.tick()
+    return engine, feeder.expected_score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка повторов без окна")
+    parser.add_argument("paths", nargs="+", help="файлы повторов")
+    args = parser.parse_args(argv)
+    failed = 0
+    for path in args.paths:
+        try:
+            engine, expected = play_headless(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: ошибка - {e}")
+            failed += 1
+            continue
+        if expected is None:  # Запись оборвана: сверить не с чем
+            failed += 1
+            status = "НЕ ПРОВЕРЕН (нет итоговых очков)"
+        elif engine.score == expected:
+            status = "OK"
+        else:
+            failed += 1
+            status = f"НЕ СОВПАДАЕТ (в записи {expected})"
+        print(f"{path}: очки {engine.score}, линии {engine.lines_cleared}, "
+              f"тактов {engine.ticks} - {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Сохранения партии в слоты на диске.
+
+Слот - JSON-файл со снимком engine.State. Файл пишется атомарно (временный
+файл и os.replace), поэтому сбой во время записи не портит прошлое
+сохранение. Восстановление - json.loads и TetrisEngine.restore(), без
+пересоздания движка, окна и звука.
+"""
+import json
+import os
+
+from engine import State
+from leaderboard import atomic_write
+
+SAVE_DIR = "saves"
+SLOTS = 3
+VERSION = 1  # Формат файла; при несовпадении сохранение не читается
+
+
+def slot_path(slot, directory=SAVE_DIR):
+    return os.path.join(directory, f"slot{slot}.json")
+
+
+def dumps(state): # Снимок в байты JSON
+    data = {"version": VERSION, "state": state._asdict()}
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads(data):
+    """Снимок из байтов dumps(); ValueError, если формат не тот."""
+    data = json.loads(data)
+    if data.get("version") != VERSION:
+        raise ValueError(f"неизвестная версия сохранения {data.get('version')}")
+    return State(**data["state"])
+
+
+def save(state, slot, directory=SAVE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    atomic_write(slot_path(slot, directory), dumps(state))
+
+
+def load(slot, directory=SAVE_DIR):
+    """Снимок из слота или None, если слот пуст или файл не читается."""
+    try:
+        with open(slot_path(slot, directory), "rb") as f:
+            return loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError, KeyError, AttributeError) as e:  # JSON не той формы
+        print(f"Сохранение в слоте {slot} не читается:", e)
+        return None
+
+
+def describe(slot, directory=SAVE_DIR): # Подпись слота для меню
+    state = load(slot, directory)
+    if state is None:
+        return "пусто"
+    return f"очки {state.score}, уровень {state.level}"
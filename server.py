@@ -0,0 +1,387 @@
+"""Сервер сетевых партий: много игр без окна в одном процессе на asyncio.
+
+Протокол - JSON по строкам поверх TCP (один объект на строку), его можно
+проверить хоть через nc. Клиент присылает:
+
+    {"type": "join", "name": "Вася", "players": 2}  # встать в очередь на матч
+    {"type": "action", "action": 1}                 # действие engine.ACTION_*
+    {"type": "sync"}                                # запросить контрольные суммы полей
+
+Сервер отвечает:
+
+    {"type": "start", "match": 1, "you": 0, "names": [...], "rows": 20, "cols": 10}
+    {"type": "state", "tick": 120, "players": [[0, {...}], ...]}
+    {"type": "digest", "tick": 120, "digests": [123456, ...]}
+    {"type": "over", "winner": 1, "scores": [...], "digests": [...]}
+    {"type": "error", "message": "..."}
+
+Игры авторитетные: клиенты только присылают действия, а все матчи
+продвигаются общим планировщиком целыми тактами TICK_MS. После тактов
+каждому матчу рассылается одно сообщение с изменениями: строки поля,
+которые отличаются от уже отправленных (ищутся только в изменившихся кусках
+board.changed), положение фигуры и счёт - только если они поменялись.
+Сообщение кодируется один раз и уходит всем игрокам матча.
+
+Очистка двух и более линий отправляет соперникам мусорные строки
+(garbage_lines); сначала ими гасится мусор, ожидающий самого игрока.
+Мусор поднимается снизу перед появлением следующей фигуры, дыра в строках
+одна на весь подъём.
+
+    python server.py --port 7777
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from collections import deque
+
+from board import CHUNK_ROWS
+from engine import TetrisEngine, ROWS, COLS, TICK_MS, ACTIONS, ACTION_SOFT_DROP, ACTION_SOFT_DROP_END
+from timing import FixedTimestep
+
+HOST = "127.0.0.1"
+PORT = 7777
+MAX_PLAYERS = 4  # Игроков в одном матче
+MAX_PENDING = 32  # Действий в очереди игрока до следующего такта, лишние отбрасываются
+MAX_LINE = 4096  # Длина строки от клиента, байт
+MAX_BUFFER = 256 * 1024  # Неотправленных байт у клиента, после этого он отключается
+STATS_INTERVAL = 5.0  # Как часто печатать нагрузку с --stats, с
+NET_ACTIONS = frozenset(ACTIONS + (ACTION_SOFT_DROP, ACTION_SOFT_DROP_END))
+
+
+def garbage_lines(lines): # Сколько мусорных строк получают соперники за очистку lines линий
+    if lines >= 4:
+        return 4
+    return max(lines - 1, 0)
+
+
+def board_digest(board):
+    """Контрольная сумма поля: у клиента и сервера совпадает, если все изменения дошли."""
+    return zlib.crc32(",".join(str(board.row_bits(row)) for row in range(board.rows)).encode())
+
+
+def encode(message): # Строка протокола
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+class Player(TetrisEngine):
+    """Партия одного игрока на сервере и то, что о ней уже знает клиент."""
+
+    def __init__(self, connection, number, seed, garbage_rng, **options):
+        """
+        :param connection: Connection клиента (None, если он отключился)
+        :param number: номер игрока в матче
+        :param seed: сид партии
+        :param garbage_rng: генератор дыр в мусорных строках (общий на матч)
+        :param options: параметры TetrisEngine
+        """
+        self.connection = connection
+        self.number = number
+        self.garbage_rng = garbage_rng
+        self.actions = deque()  # Действия до следующего такта
+        self.incoming = 0  # Мусорные строки, которые поднимутся перед следующей фигурой
+        self.outgoing = 0  # Мусорные строки для соперников, ещё не разосланные матчем
+        self.pieces = 0  # Номер текущей фигуры: клиент видит, что фигура новая
+        super().__init__(seed=seed, **options)
+        self.sent_rows = [0] * self.rows  # Строки поля, уже отправленные клиентам
+        self.sent_piece = None
+        self.sent_stats = None
+
+    def spawn_next(self, lines):
+        """Очищенные линии сначала гасят входящий мусор, остаток поднимается снизу."""
+        garbage = garbage_lines(lines)
+        cancelled = min(garbage, self.incoming)
+        self.incoming -= cancelled
+        self.outgoing += garbage - cancelled
+        overflow = False
+        if self.incoming:
+            overflow = self.board.add_garbage(self.incoming, self.garbage_rng.randrange(self.cols))
+            self.incoming = 0
+        self.pieces += 1
+        lines = super().spawn_next(lines)
+        if overflow:
+            self.game_over = True
+        return lines
+
+    def delta(self):
+        """Изменения с прошлой рассылки; None, если их нет."""
+        state = {}
+        board = self.board
+        if board.changed:
+            rows = []
+            sent = self.sent_rows
+            for chunk in board.changed:
+                for row in range(chunk * CHUNK_ROWS, min((chunk + 1) * CHUNK_ROWS, self.rows)):
+                    value = board.row_bits(row)
+                    if value != sent[row]:
+                        sent[row] = value
+                        rows.append((row, value))
+            board.changed.clear()
+            if rows:
+                state["rows"] = rows
+        piece = (self.piece.shape_id, self.piece.index, self.x, self.y, self.pieces)
+        if piece != self.sent_piece:
+            self.sent_piece = state["piece"] = piece
+        stats = ((self.next.shape_id, self.next.index), self.score, self.level, self.lines_cleared,
+                 self.incoming, self.game_over)
+        if stats != self.sent_stats:
+            self.sent_stats = stats
+            state.update(next=stats[0], score=stats[1], level=stats[2], lines=stats[3],
+                         garbage=stats[4], over=stats[5])
+        return state or None
+
+
+class Match:
+    def __init__(self, number, connections, seed, options):
+        self.number = number
+        garbage_rng = random.Random(seed)
+        # Все игроки получают одну последовательность фигур
+        self.players = [Player(connection, i, seed, garbage_rng, **options)
+                        for i, connection in enumerate(connections)]
+        self.syncs = []  # Соединения, запросившие контрольные суммы
+        self.finished = False
+
+    @property
+    def alive(self):
+        return [player for player in self.players if not player.game_over]
+
+    def start(self):
+        names = [player.connection.name for player in self.players]
+        for player in self.players:
+            player.connection.player = player
+            player.connection.match = self
+            player.connection.send({"type": "start", "match": self.number, "you": player.number,
+                                    "names": names, "rows": player.rows, "cols": player.cols})
+
+    def tick(self):
+        for player in self.players:
+            if player.game_over:
+                continue
+            actions = player.actions
+            while actions and not player.game_over:
+                player.handle_action(actions.popleft())
+            player.tick()
+            if player.outgoing:
+                self.send_garbage(player)
+
+    def send_garbage(self, sender): # Мусор игрока - всем оставшимся соперникам
+        for player in self.players:
+            if player is not sender and not player.game_over:
+                player.incoming += sender.outgoing
+        sender.outgoing = 0
+
+    def broadcast(self, tick):
+        """Рассылает изменения всех игроков; возвращает число отправленных байт."""
+        players = [(player.number, delta) for player in self.players
+                   for delta in (player.delta(),) if delta]
+        sent = 0
+        if players:
+            sent += self.send({"type": "state", "tick": tick, "players": players})
+        if self.syncs:
+            digest = encode({"type": "digest", "tick": tick, "digests": self.digests()})
+            for connection in self.syncs:
+                connection.write(digest)
+            self.syncs.clear()
+        # Матч окончен, когда играть некому или остался один (в одиночной - никого)
+        if len(self.alive) <= (len(self.players) > 1):
+            self.finished = True
+            best = max(self.players, key=lambda player: (not player.game_over, player.score))
+            sent += self.send({"type": "over", "winner": best.number,
+                               "scores": [player.score for player in self.players],
+                               "digests": self.digests()})
+            for player in self.players:
+                if player.connection:
+                    player.connection.player = player.connection.match = None
+        return sent
+
+    def digests(self):
+        return [board_digest(player.board) for player in self.players]
+
+    def send(self, message): # Одно кодирование на всех игроков матча
+        data = encode(message)
+        for player in self.players:
+            if player.connection:
+                player.connection.write(data)
+        return len(data) * len(self.players)
+
+    def leave(self, player): # Клиент отключился: его партия проиграна
+        player.connection = None
+        player.game_over = True
+
+
+class Connection:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.name = "Anon"
+        self.player = None
+        self.match = None
+
+    def write(self, data):
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            self.writer.close()  # Клиент не успевает читать - ждать его нельзя
+            return
+        self.writer.write(data)
+
+    def send(self, message):
+        self.write(encode(message))
+
+    def handle(self, message):
+        kind = message.get("type")
+        if kind == "action":
+            action = message.get("action")
+            if type(action) is not int or action not in NET_ACTIONS:  # true и 1.0 - не действия
+                self.send({"type": "error", "message": f"неизвестное действие {action!r}"})
+                return
+            if self.player is None:
+                return
+            if len(self.player.actions) < MAX_PENDING:
+                self.player.actions.append(action)
+        elif kind == "join":
+            if self.match is not None or self in self.server.queued:
+                self.send({"type": "error", "message": "уже в игре"})
+                return
+            players = message.get("players", 2)
+            if type(players) is not int or not 1 <= players <= MAX_PLAYERS:
+                self.send({"type": "error", "message": f"игроков в матче: от 1 до {MAX_PLAYERS}"})
+                return
+            self.name = str(message.get("name") or "Anon")[:16]
+            self.server.join(self, players)
+        elif kind == "sync":
+            if self.match is not None:
+                self.match.syncs.append(self)
+        else:
+            self.send({"type": "error", "message": f"неизвестное сообщение {kind!r}"})
+
+    async def serve(self):
+        try:
+            while True:
+                try:
+                    line = await self.reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError:
+                    break  # Клиент закрыл соединение
+                except asyncio.LimitOverrunError:
+                    self.send({"type": "error", "message": "слишком длинная строка"})
+                    break
+                try:
+                    message = json.loads(line)
+                except (ValueError, RecursionError):  # RecursionError - слишком глубокая вложенность
+                    self.send({"type": "error", "message": "ожидается JSON"})
+                    continue
+                if isinstance(message, dict):
+                    self.handle(message)
+        except ConnectionError:
+            pass
+        finally:
+            self.server.leave(self)
+            self.writer.close()
+
+
+class Server:
+    def __init__(self, rows=ROWS, cols=COLS, lock_delay=None, clear_delay=0, stats=False):
+        """
+        :param rows, cols: размеры поля во всех матчах
+        :param lock_delay, clear_delay: параметры TetrisEngine
+        :param stats: печатать нагрузку раз в STATS_INTERVAL секунд
+        """
+        self.options = dict(rows=rows, cols=cols, lock_delay=lock_delay, clear_delay=clear_delay)
+        self.stats = stats
+        self.matches = []
+        self.waiting = {}  # Игроков в матче -> очередь соединений
+        self.match_number = 0
+        self.ticks = 0
+        self.busy = 0.0  # Время работы планировщика с прошлой печати нагрузки, с
+        self.sent = 0  # Байт с прошлой печати нагрузки
+        self.server = None
+
+    @property
+    def queued(self):
+        return [connection for queue in self.waiting.values() for connection in queue]
+
+    def join(self, connection, players):
+        queue = self.waiting.setdefault(players, [])
+        queue.append(connection)
+        if len(queue) == players:
+            del self.waiting[players]
+            self.match_number += 1
+            match = Match(self.match_number, queue, random.randrange(2 ** 32), self.options)
+            match.start()
+            self.matches.append(match)
+
+    def leave(self, connection):
+        for queue in self.waiting.values():
+            if connection in queue:
+                queue.remove(connection)
+        if connection.match is not None:
+            connection.match.leave(connection.player)
+            connection.match = connection.player = None
+
+    async def start(self, host=HOST, port=PORT):
+        self.server = await asyncio.start_server(self.accept, host, port, limit=MAX_LINE)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def accept(self, reader, writer):
+        await Connection(self, reader, writer).serve()
+
+    async def run(self):
+        """Общий планировщик: такты всех матчей и рассылка изменений."""
+        timestep = FixedTimestep(TICK_MS)
+        clock = time.perf_counter
+        report = clock() + STATS_INTERVAL
+        while True:
+            start = clock()
+            steps = timestep.advance()
+            if steps:
+                for _ in range(steps):
+                    self.ticks += 1
+                    for match in self.matches:
+                        match.tick()
+                for match in self.matches:
+                    self.sent += match.broadcast(self.ticks)
+                if any(match.finished for match in self.matches):
+                    self.matches = [match for match in self.matches if not match.finished]
+            now = clock()
+            self.busy += now - start
+            if self.stats and now >= report:
+                self.print_stats(now - report + STATS_INTERVAL)
+                report = now + STATS_INTERVAL
+            # Спим до следующего такта
+            await asyncio.sleep(max(0.0, (TICK_MS - timestep.accumulator) / 1000))
+
+    def print_stats(self, elapsed):
+        players = sum(len(match.players) for match in self.matches)
+        print(f"матчей {len(self.matches)}, игроков {players}, в очереди {len(self.queued)}, "
+              f"нагрузка {self.busy / elapsed:.0%}, отправлено {self.sent / elapsed / 1024:.0f} КБ/с")
+        self.busy = 0.0
+        self.sent = 0
+
+    async def serve(self, host=HOST, port=PORT):
+        port = await self.start(host, port)
+        print(f"Сервер слушает {host}:{port}")
+        async with self.server:
+            await self.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер сетевых партий тетриса")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--rows", type=int, default=ROWS, help="высота поля в клетках")
+    parser.add_argument("--cols", type=int, default=COLS, help="ширина поля в клетках")
+    parser.add_argument("--lock-delay", type=int, default=None, help="задержка фиксации фигуры, мс")
+    parser.add_argument("--stats", action="store_true", help="печатать нагрузку сервера")
+    args = parser.parse_args(argv)
+    server = Server(rows=args.rows, cols=args.cols, lock_delay=args.lock_delay, stats=args.stats)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
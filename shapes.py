@@ -0,0 +1,136 @@
+"""Наборы фигур по уровням сложности."""
+from functools import lru_cache
+
+# Фигуры (тетромино)
+SHAPES_1 = [ # Фигуры начальной сложности
+    [[1]],                   # 1 I-образная
+    [[1, 1]],                # 2 I-образная
+    [[1, 1, 1]],             # 3 I-образная
+    [[0, 1, 0], [1, 1, 1]],  # 4 T-маленькая
+    [[1, 0, 0], [1, 1, 1]],  # 4 L-образная
+    [[0, 0, 1], [1, 1, 1]],  # 4 J-образная
+    [[1, 1], [1, 1]],        # 4 O-образная
+]
+SHAPES_2 = [ # Фигуры 2
+    [[1, 1, 0], [0, 1, 1]],  # 4 Z-образная
+    [[0, 1, 1], [1, 1, 0]],  # 4 S-образная
+]
+SHAPES_3 = [ # Фигуры 3
+    [[1, 1, 1, 1]],          # 4 I-образная
+    [[1, 1, 1, 1, 1]],       # 5 I-образная
+]
+SHAPES_4 = [ # Фигуры 4
+    [[0, 1, 0], [0, 1, 0], [1, 1, 1]],  # 5 Т-большая
+]
+SHAPES_5 = [ # Фигуры 5
+    [[1, 1], [1, 1], [1, 0]],  # 5 6-образная
+    [[1, 1], [1, 1], [0, 1]],  # 5 d-образная
+]
+SHAPES_6 = [ # Фигуры 6
+    [[1, 0, 1], [1, 1, 1]],    # 5 П-образная
+]
+SHAPES_7 = [ # Фигуры 7
+    [[1, 0, 0], [1, 0, 0], [1, 1, 1]],   # 5 Г-образная
+]
+SHAPES_8 = [ # Фигуры 8
+    [[1, 1, 0], [0, 1, 0], [0, 1, 1]],   # 5 3-образная
+]
+SHAPES_9 = [ # Фигуры 9
+    [[1, 1, 1, 1], [0, 0, 0, 1]],   # 5 Г-длинная
+    [[1, 1, 1, 1], [1, 0, 0, 0]],   # 5 L-длинная
+]
+SHAPES_10 = [ # Фигуры 10
+    [[1, 1, 1, 0], [0, 0, 1, 1]],   # 5 Z-длинная
+    [[0, 1, 1, 1], [1, 1, 0, 0]],   # 5 S-длинная
+]
+
+# Наборы по порядку: на уровне N доступны наборы 1..N
+SHAPE_SETS = (SHAPES_1, SHAPES_2, SHAPES_3, SHAPES_4, SHAPES_5,
+              SHAPES_6, SHAPES_7, SHAPES_8, SHAPES_9, SHAPES_10)
+
+
+class Rotation:
+    """Одно положение (поворот) фигуры со всеми заранее посчитанными данными."""
+    __slots__ = ("shape_id", "index", "matrix", "cells", "width", "height",
+                 "masks", "profile", "left", "right", "spawn_x", "next")
+
+    def __init__(self, shape_id, index, matrix, cols):
+        self.shape_id = shape_id
+        self.index = index
+        self.matrix = matrix  # Кортеж кортежей из 0/1 - для отрисовки
+        self.cells = tuple((row, col) for row, line in enumerate(matrix)
+                           for col, cell in enumerate(line) if cell)
+        self.height = len(matrix)
+        self.width = len(matrix[0])
+        # Маски строк: бит col - столбец col относительно левого края фигуры
+        self.masks = tuple(sum(1 << col for col, cell in enumerate(line) if cell) for line in matrix)
+        # Занятые столбцы: (столбец, верхняя клетка, нижняя клетка, клеток в столбце);
+        # по нижним клеткам считается, куда фигура упадёт на поверхность стопки
+        self.profile = tuple((col, min(rows), max(rows), len(rows))
+                             for col in range(self.width)
+                             for rows in ([row for row, c in self.cells if c == col],) if rows)
+        self.left = min(col for _, col in self.cells)
+        self.right = max(col for _, col in self.cells)
+        self.spawn_x = cols // 2 - self.width // 2
+        self.next = None  # Следующий поворот по часовой стрелке
+
+    def __repr__(self):
+        return f"Rotation(shape={self.shape_id}, index={self.index})"
+
+
+class Shape:
+    """Фигура: четыре поворота и список различных положений."""
+    __slots__ = ("id", "rotations", "orientations")
+
+    def __init__(self, shape_id, matrix, cols):
+        self.id = shape_id
+        matrices = []
+        current = tuple(tuple(1 if cell else 0 for cell in row) for row in matrix)
+        for _ in range(4):
+            matrices.append(current)
+            current = tuple(zip(*current[::-1]))  # Поворот по часовой стрелке
+        self.rotations = tuple(Rotation(shape_id, i, m, cols) for i, m in enumerate(matrices))
+        for i, rotation in enumerate(self.rotations):
+            rotation.next = self.rotations[(i + 1) % 4]
+        # Различные положения (для O-образной - одно) - пригодятся ботам
+        seen = {}
+        for rotation in self.rotations:
+            seen.setdefault(rotation.matrix, rotation)
+        self.orientations = tuple(seen.values())
+
+
+class ShapeRegistry:
+    """
+    Реестр фигур, строится один раз при запуске.
+    Каждый добавленный набор открывает новый уровень сложности.
+    """
+
+    def __init__(self, cols, shape_sets=SHAPE_SETS):
+        self.cols = cols
+        self.shapes = []
+        self.level_pools = ()  # Пул начальных положений фигур для каждого уровня
+        for shapes in shape_sets:
+            self.add_set(shapes)
+
+    def add_set(self, shapes): # Добавляем набор фигур как следующий уровень
+        pool = self.level_pools[-1] if self.level_pools else ()
+        for matrix in shapes:
+            shape = Shape(len(self.shapes), matrix, self.cols)
+            self.shapes.append(shape)
+            pool += (shape.rotations[0],)
+        self.level_pools += (pool,)
+
+    def pool(self, level): # Фигуры, доступные на уровне
+        return self.level_pools[max(1, min(level, len(self.level_pools))) - 1]
+
+    def __getitem__(self, shape_id):
+        return self.shapes[shape_id]
+
+    def __len__(self):
+        return len(self.shapes)
+
+
+@lru_cache(maxsize=None)
+def shape_registry(cols):
+    """Общий реестр для поля шириной cols (от ширины зависит место появления фигур)."""
+    return ShapeRegistry(cols)
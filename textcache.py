@@ -0,0 +1,49 @@
+"""Кэш шрифтов и отрисованных надписей.
+
+SysFont ищет шрифт в системе при каждом вызове, а render растрирует текст
+заново. Здесь шрифты создаются один раз, а готовые поверхности надписей
+хранятся по ключу (шрифт, текст, цвет) с вытеснением давно не использованных.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    def __init__(self, max_size=256):
+        self.max_size = max_size  # Сколько надписей держать в памяти
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, name, size): # Шрифт ищется в системе только при первом запросе
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()  # Модуль шрифтов включается при первой надписи
+            font = self.fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def render(self, text, color, size=18, name="Arial"):
+        """
+        Готовая поверхность с надписью.
+        :param text: текст
+        :param color: цвет текста
+        :param size: размер шрифта
+        :param name: имя системного шрифта
+        """
+        key = (name, size, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self.font(name, size).render(text, True, color)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()  # Быстрее выводится на экран
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
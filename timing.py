@@ -0,0 +1,73 @@
+"""Фиксированный шаг симуляции, не зависящий от частоты кадров.
+
+Реальное время копится в аккумуляторе и расходуется целыми тактами
+одинаковой длины, поэтому гравитация и таймеры движка идут одинаково
+при любой скорости отрисовки.
+"""
+import time
+
+MAX_STEPS = 50  # Тактов за кадр при обычной скорости
+
+
+class FixedTimestep:
+    def __init__(self, step_ms, max_steps=MAX_STEPS, clock=time.perf_counter):
+        self.step_ms = step_ms
+        # Больше max_steps тактов за кадр не выполняем: если отрисовка сильно
+        # отстала, игра замедляется, но такты остаются теми же
+        self.max_steps = max_steps
+        self.clock = clock
+        self.accumulator = 0.0
+        self.last = None
+
+    def reset(self): # Забываем накопленное время (после паузы, меню)
+        self.accumulator = 0.0
+        self.last = None
+
+    def advance(self):
+        """
+        Добавляет прошедшее с прошлого вызова время.
+        :return: сколько тактов симуляции нужно выполнить сейчас
+        """
+        now = self.clock() * 1000
+        if self.last is not None:
+            self.accumulator += now - self.last
+        self.last = now
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            self.accumulator = 0.0
+            return self.max_steps
+        self.accumulator -= steps * self.step_ms
+        return steps
+
+
+class StartupTimer:
+    """Время от запуска до первого кадра по этапам, с бюджетом."""
+
+    def __init__(self, budget_ms, clock=time.perf_counter):
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.start = self.last = clock()
+        self.stages = []  # (этап, мс)
+        self.total_ms = None  # Заполняется на первом кадре
+
+    def mark(self, stage): # Время с прошлой отметки - этапу stage
+        if self.total_ms is None:
+            now = self.clock()
+            self.stages.append((stage, (now - self.last) * 1000))
+            self.last = now
+
+    def finish(self):
+        """Отмечает первый кадр. Возвращает True только при первом вызове."""
+        if self.total_ms is not None:
+            return False
+        self.mark("first_frame")
+        self.total_ms = (self.last - self.start) * 1000
+        return True
+
+    @property
+    def over_budget(self):
+        return self.total_ms is not None and self.total_ms > self.budget_ms
+
+    def report(self):
+        stages = ", ".join(f"{stage} {ms:.0f}" for stage, ms in self.stages)
+        return f"Запуск до первого кадра: {self.total_ms:.0f} мс (бюджет {self.budget_ms} мс; {stages})"
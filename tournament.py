@@ -0,0 +1,116 @@
+"""Турнир бота: много партий параллельно на всех ядрах.
+
+Пример:
+    python tournament.py --games 200 --heuristic default --lines-per-level 8
+
+Каждая партия получает свой сид (--seed + номер партии), поэтому результат
+не зависит от числа процессов.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bot import Bot, HEURISTICS
+from engine import (TetrisEngine, LINES_PER_LEVEL, FALL_SPEED_BASE,
+                    FALL_SPEED_STEP, FALL_SPEED_MIN)
+
+
+def play_game(task):
+    """Одна партия бота; task - словарь параметров (передаётся в процесс)."""
+    engine = TetrisEngine(seed=task["seed"], **task["progression"])
+    bot = Bot(task["weights"])
+    pieces = 0
+    start = time.perf_counter()
+    while not engine.game_over and pieces < task["max_pieces"]:
+        bot.play(engine)
+        pieces += 1
+    return {
+        "seed": task["seed"],
+        "score": engine.score,
+        "lines": engine.lines_cleared,
+        "level": engine.level,
+        "fall_speed": engine.fall_speed,
+        "pieces": pieces,
+        "seconds": time.perf_counter() - start,
+        "game_over": engine.game_over,
+    }
+
+
+def summarize(results, wall_time):
+    """Сводка по партиям: средние, медианы и крайние значения."""
+    summary = {"games": len(results), "wall_seconds": wall_time}
+    for key in ("score", "lines", "level", "pieces"):
+        values = [result[key] for result in results]
+        summary[key] = {
+            "mean": statistics.fmean(values),
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+        }
+    pieces = sum(result["pieces"] for result in results)
+    busy = sum(result["seconds"] for result in results)
+    summary["pieces_per_second"] = pieces / busy if busy else 0.0  # На одно ядро
+    summary["pieces_per_second_total"] = pieces / wall_time if wall_time else 0.0
+    summary["topped_out"] = sum(result["game_over"] for result in results)
+    return summary
+
+
+def parse_weights(text):
+    """Веса вида 'height=-0.5,holes=-0.3' поверх эвристики."""
+    weights = {}
+    for item in filter(None, text.split(",")):
+        name, value = item.split("=")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Турнир бота на пуле процессов")
+    parser.add_argument("--games", type=int, default=100, help="количество партий")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="количество процессов")
+    parser.add_argument("--seed", type=int, default=0, help="сид первой партии")
+    parser.add_argument("--max-pieces", type=int, default=5000, help="ограничение фигур на партию")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default="default")
+    parser.add_argument("--weights", default="", help="свои веса, например height=-0.5,holes=-0.3")
+    parser.add_argument("--lines-per-level", type=int, default=LINES_PER_LEVEL)
+    parser.add_argument("--fall-speed-base", type=int, default=FALL_SPEED_BASE)
+    parser.add_argument("--fall-speed-step", type=int, default=FALL_SPEED_STEP)
+    parser.add_argument("--fall-speed-min", type=int, default=FALL_SPEED_MIN)
+    parser.add_argument("--json", help="сохранить сводку и результаты партий в файл")
+    args = parser.parse_args(argv)
+
+    weights = dict(HEURISTICS[args.heuristic], **parse_weights(args.weights))
+    progression = {
+        "lines_per_level": args.lines_per_level,
+        "fall_speed_base": args.fall_speed_base,
+        "fall_speed_step": args.fall_speed_step,
+        "fall_speed_min": args.fall_speed_min,
+    }
+    tasks = [{"seed": args.seed + i, "weights": weights, "max_pieces": args.max_pieces,
+              "progression": progression} for i in range(args.games)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunksize = max(1, args.games // (args.workers * 4))
+        results = list(pool.map(play_game, tasks, chunksize=chunksize))
+    summary = summarize(results, time.perf_counter() - start)
+
+    print(f"Партий: {summary['games']}, процессов: {args.workers}, время: {summary['wall_seconds']:.1f} с")
+    for key, title in (("score", "Очки"), ("lines", "Линии"), ("level", "Уровень"), ("pieces", "Фигуры")):
+        stats = summary[key]
+        print(f"{title}: среднее {stats['mean']:.1f}, медиана {stats['median']}, "
+              f"мин {stats['min']}, макс {stats['max']}")
+    print(f"Фигур в секунду: {summary['pieces_per_second']:.0f} на процесс, "
+          f"{summary['pieces_per_second_total']:.0f} всего")
+    print(f"Проиграно партий: {summary['topped_out']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "games": results}, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
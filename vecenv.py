@@ -0,0 +1,181 @@
+"""Пакетная среда: N независимых партий, которые идут в ногу на массивах NumPy.
+
+Правила те же, что у TetrisEngine.step(): действие, затем шаг гравитации,
+ACTION_DROP сбрасывает и сразу фиксирует фигуру. При одинаковых сидах партии
+совпадают с TetrisEngine(rng=random.Random(seed)) ход в ход.
+
+Поле хранится с рамкой из заполненных клеток (стены и пол), поэтому
+проверка столкновения для всех партий - одно окно 5x5 и одно AND.
+"""
+import random
+
+import numpy as np
+
+from engine import (ROWS, COLS, SHAPE_REGISTRY, LINES_PER_LEVEL, ACTION_NONE,
+                    ACTION_ROTATE, ACTION_DROP)
+
+PAD = 5  # Ширина рамки; фигуры не больше 5x5
+SPAN = np.arange(PAD)
+
+# Смещения для действий (индекс - номер действия)
+ACTION_DX = np.array([0, -1, 1, 0, 0, 0])
+ACTION_DY = np.array([0, 0, 0, 1, 0, 0])
+
+
+def _rotation_tables(registry):
+    """Массивы по всем положениям фигур: id положения = shape_id * 4 + поворот."""
+    count = len(registry) * 4
+    masks = np.zeros((count, PAD, PAD), dtype=bool)
+    next_rotation = np.zeros(count, dtype=np.int64)
+    spawn_x = np.zeros(count, dtype=np.int64)
+    for shape in registry.shapes:
+        for rotation in shape.rotations:
+            rid = shape.id * 4 + rotation.index
+            for row, col in rotation.cells:
+                masks[rid, row, col] = True
+            next_rotation[rid] = shape.id * 4 + rotation.next.index
+            spawn_x[rid] = rotation.spawn_x
+    return masks, next_rotation, spawn_x
+
+
+MASKS, NEXT_ROTATION, SPAWN_X = _rotation_tables(SHAPE_REGISTRY)
+
+
+class VecTetrisEnv:
+    def __init__(self, num_envs, seeds=None):
+        self.num_envs = num_envs
+        n = num_envs
+        # Поле с рамкой: слева и справа по PAD столбцов стен, снизу PAD строк пола
+        self.padded = np.ones((n, ROWS + PAD, COLS + 2 * PAD), dtype=bool)
+        self.boards = self.padded[:, :ROWS, PAD:PAD + COLS]  # Вид на само поле
+        self.empty_row = self.padded[0, 0].copy()
+        self.empty_row[PAD:PAD + COLS] = False
+
+        self.piece = np.zeros(n, dtype=np.int64)  # id положения текущей фигуры
+        self.next_piece = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.dones = np.zeros(n, dtype=bool)
+        self.rngs = [None] * n
+        self.reset(seeds)
+
+    def reset(self, seeds=None, indices=None):
+        """
+        Начинает партии заново.
+        :param seeds: сиды для каждой партии (по умолчанию случайные)
+        :param indices: номера партий (по умолчанию все)
+        :return: наблюдение
+        """
+        if indices is None:
+            indices = range(self.num_envs)
+        indices = list(indices)
+        if seeds is None:
+            seeds = [random.randrange(2 ** 32) for _ in indices]
+        for i, seed in zip(indices, seeds):
+            rng = self.rngs[i] = random.Random(seed)
+            self.padded[i, :ROWS] = self.empty_row
+            self.score[i] = self.lines_cleared[i] = 0
+            self.level[i] = 1
+            # Как в TetrisEngine.reset(): текущая и следующая фигуры
+            self.piece[i] = rng.choice(SHAPE_REGISTRY.pool(1)).shape_id * 4
+            self.next_piece[i] = rng.choice(SHAPE_REGISTRY.pool(1)).shape_id * 4
+            self.x[i] = SPAWN_X[self.piece[i]]
+            self.y[i] = 0
+            self.dones[i] = False
+        return self.observation()
+
+    def collides(self, envs, pieces, xs, ys):
+        """Столкновение фигур pieces в точках (xs, ys) для партий envs."""
+        rows = ys[:, None] + SPAN
+        cols = xs[:, None] + PAD + SPAN
+        window = self.padded[envs[:, None, None], rows[:, :, None], cols[:, None, :]]
+        return (window & MASKS[pieces]).any(axis=(1, 2))
+
+    def step(self, actions):
+        """
+        Один шаг во всех незавершённых партиях.
+        :param actions: массив ACTION_* длины num_envs
+        :return: (наблюдение, награды, признаки конца, info)
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.int64)
+        active = np.flatnonzero(~self.dones)
+        if not len(active):
+            return self.observation(), rewards, self.dones.copy(), {}
+        act = actions[active]
+
+        # Действие: сдвиг или поворот, если на новом месте нет столкновения
+        moving = active[(act != ACTION_DROP) & (act != ACTION_NONE)]
+        if len(moving):
+            a = actions[moving]
+            xs = self.x[moving] + ACTION_DX[a]
+            ys = self.y[moving] + ACTION_DY[a]
+            pieces = np.where(a == ACTION_ROTATE, NEXT_ROTATION[self.piece[moving]], self.piece[moving])
+            ok = ~self.collides(moving, pieces, xs, ys)
+            moved = moving[ok]
+            self.x[moved] = xs[ok]
+            self.y[moved] = ys[ok]
+            self.piece[moved] = pieces[ok]
+
+        # Сброс: опускаем, пока внизу свободно
+        dropping = active[act == ACTION_DROP]
+        falling = dropping
+        while len(falling):
+            free = ~self.collides(falling, self.piece[falling], self.x[falling], self.y[falling] + 1)
+            falling = falling[free]
+            self.y[falling] += 1
+
+        # Гравитация для остальных: вниз на клетку или фиксация
+        rest = active[act != ACTION_DROP]
+        landed = self.collides(rest, self.piece[rest], self.x[rest], self.y[rest] + 1)
+        self.y[rest[~landed]] += 1
+        locking = np.concatenate([dropping, rest[landed]])
+        if len(locking):
+            rewards[locking] = self._lock(locking)
+        return self.observation(), rewards, self.dones.copy(), {"lines": rewards // 100}
+
+    def _lock(self, envs):
+        """Фиксация фигур, очистка линий и новая фигура. Возвращает очки."""
+        rows = self.y[envs][:, None] + SPAN
+        cols = self.x[envs][:, None] + PAD + SPAN
+        index = (envs[:, None, None], rows[:, :, None], cols[:, None, :])
+        self.padded[index] = self.padded[index] | MASKS[self.piece[envs]]
+
+        # Заполненные строки уходят вверх и заменяются пустыми, порядок остальных сохраняется
+        full = self.boards[envs].all(axis=2)
+        lines = full.sum(axis=1)
+        clearing = envs[lines > 0]
+        if len(clearing):
+            full = full[lines > 0]
+            order = np.argsort(~full, axis=1, kind="stable")
+            block = self.padded[clearing, :ROWS]
+            block = np.take_along_axis(block, order[:, :, None], axis=1)
+            block[np.arange(ROWS)[None, :] < lines[lines > 0][:, None]] = self.empty_row
+            self.padded[clearing, :ROWS] = block
+
+        self.score[envs] += lines * 100
+        self.lines_cleared[envs] += lines
+        self.level[envs] = self.lines_cleared[envs] // LINES_PER_LEVEL + 1
+
+        # Следующая фигура - из генератора своей партии, как в TetrisEngine.new_piece()
+        self.piece[envs] = self.next_piece[envs]
+        for i, level in zip(envs.tolist(), self.level[envs].tolist()):
+            self.next_piece[i] = self.rngs[i].choice(SHAPE_REGISTRY.pool(level)).shape_id * 4
+        self.x[envs] = SPAWN_X[self.piece[envs]]
+        self.y[envs] = 0
+        self.dones[envs] = self.collides(envs, self.piece[envs], self.x[envs], self.y[envs])
+        return lines * 100
+
+    def observation(self):
+        """Наблюдение для всех партий: поле (N, ROWS, COLS) и данные фигур."""
+        return {
+            "board": self.boards.astype(np.uint8),
+            "piece": self.piece // 4,
+            "rotation": self.piece % 4,
+            "x": self.x.copy(),
+            "y": self.y.copy(),
+            "next_piece": self.next_piece // 4,
+        }